@@ -0,0 +1,47 @@
+"""Populate post search vector
+
+Revision ID: 3b8e41f07a2d
+Revises: fe007838d43d
+Create Date: 2026-10-19 15:42:08.517303
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b8e41f07a2d'
+down_revision = 'fe007838d43d'
+branch_labels = None
+depends_on = None
+
+
+# Title terms weigh more than body terms (see app/core/related.py)
+SEARCH_VECTOR = """
+    setweight(to_tsvector('english', coalesce({row}title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce({row}content, '')), 'B')
+"""
+
+
+def upgrade() -> None:
+    # search_vector had a GIN index but nothing ever wrote it; keep it in sync with a trigger
+    op.execute(f"""
+        CREATE FUNCTION posts_search_vector_update() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {SEARCH_VECTOR.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """)
+    op.execute("""
+        CREATE TRIGGER posts_search_vector_trigger
+        BEFORE INSERT OR UPDATE OF title, content ON posts
+        FOR EACH ROW EXECUTE FUNCTION posts_search_vector_update()
+    """)
+    op.execute(f"UPDATE posts SET search_vector = {SEARCH_VECTOR.format(row='')}")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER posts_search_vector_trigger ON posts")
+    op.execute("DROP FUNCTION posts_search_vector_update()")
+    op.execute("UPDATE posts SET search_vector = NULL")
@@ -0,0 +1,30 @@
+"""Add comments parent index
+
+Revision ID: 7d41b2e9c0f3
+Revises: 3b8e41f07a2d
+Create Date: 2026-10-19 18:42:05.118304
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d41b2e9c0f3'
+down_revision = '3b8e41f07a2d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Replies of a comment: the ON DELETE CASCADE check and the moderation
+    # jobs' leaf-first comment deletes (app/core/jobs.py). Top-level comments,
+    # the majority, have no parent and stay out of the index
+    op.create_index(
+        'idx_comments_parent_comment_id', 'comments', ['parent_comment_id'], unique=False,
+        postgresql_where=sa.text('parent_comment_id IS NOT NULL')
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_comments_parent_comment_id', table_name='comments')
@@ -0,0 +1,28 @@
+"""Add users username trigram index
+
+Revision ID: c5c2d316e948
+Revises: a9c0c09c2526
+Create Date: 2026-10-19 10:12:41.508213
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5c2d316e948'
+down_revision = 'a9c0c09c2526'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.create_index(
+        'idx_users_username_trgm', 'users', ['username'], unique=False,
+        postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_users_username_trgm', table_name='users', postgresql_using='gin')
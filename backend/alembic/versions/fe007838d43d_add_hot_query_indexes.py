@@ -0,0 +1,48 @@
+"""Add hot query indexes
+
+Revision ID: fe007838d43d
+Revises: c5c2d316e948
+Create Date: 2026-10-19 11:03:17.224960
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fe007838d43d'
+down_revision = 'c5c2d316e948'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Feed: WHERE status = ... ORDER BY created_at DESC (replaces idx_posts_status)
+    op.create_index('idx_posts_status_created_at', 'posts', ['status', 'created_at'], unique=False)
+    op.drop_index('idx_posts_status', table_name='posts')
+    # Comment lists and counts per post, comment counts per user
+    op.create_index('idx_comments_post_id_created_at', 'comments', ['post_id', 'created_at'], unique=False)
+    op.create_index('idx_comments_user_id', 'comments', ['user_id'], unique=False)
+    # Primary keys lead with user_id, so per-post lookups need their own index
+    op.create_index('idx_post_likes_post_id', 'post_likes', ['post_id'], unique=False)
+    op.create_index('idx_favorites_post_id', 'favorites', ['post_id'], unique=False)
+    # Post search is a substring ILIKE on title/content; pg_trgm indexes serve it
+    op.create_index(
+        'idx_posts_title_trgm', 'posts', ['title'], unique=False,
+        postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+    )
+    op.create_index(
+        'idx_posts_content_trgm', 'posts', ['content'], unique=False,
+        postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('idx_posts_content_trgm', table_name='posts', postgresql_using='gin')
+    op.drop_index('idx_posts_title_trgm', table_name='posts', postgresql_using='gin')
+    op.drop_index('idx_favorites_post_id', table_name='favorites')
+    op.drop_index('idx_post_likes_post_id', table_name='post_likes')
+    op.drop_index('idx_comments_user_id', table_name='comments')
+    op.drop_index('idx_comments_post_id_created_at', table_name='comments')
+    op.create_index('idx_posts_status', 'posts', ['status'], unique=False)
+    op.drop_index('idx_posts_status_created_at', table_name='posts')
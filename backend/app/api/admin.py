@@ -0,0 +1,65 @@
+from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from ..models.user import User
+from ..schemas.admin import RequestProfile, UserModeration, PostPurge, Job
+from ..api.deps import get_current_admin_user
+from ..core.profiling import recent_profiles
+from ..core.export import SITE_TABLES, export_lines, export_response
+from ..core.jobs import create_job, get_job, start_job
+
+router = APIRouter(prefix="/admin", tags=["Admin"])
+
+
+@router.get("/profiles", response_model=List[RequestProfile])
+def get_profiles(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: User = Depends(get_current_admin_user)
+):
+    """Most recent request profiles, newest first (needs PROFILING_ENABLED)"""
+    return recent_profiles(limit)
+
+
+@router.get("/export")
+def export_site(request: Request, current_user: User = Depends(get_current_admin_user)):
+    """Full-site NDJSON dump (without password hashes), e.g. to seed staging"""
+    return export_response(request, export_lines(SITE_TABLES), "mostinger-site.ndjson")
+
+
+def _job_or_404(job_id: str) -> dict:
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+    return job
+
+
+@router.post("/jobs/users", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def moderate_users(data: UserModeration, current_user: User = Depends(get_current_admin_user)):
+    """Deactivate users and/or purge everything they posted, in the background"""
+    if current_user.id in data.user_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Cannot moderate yourself")
+    job_id = create_job("users", data.model_dump())
+    start_job(job_id)
+    return get_job(job_id)
+
+
+@router.post("/jobs/posts", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def purge_posts(data: PostPurge, current_user: User = Depends(get_current_admin_user)):
+    """Delete posts with their comments, likes and favorites, in the background"""
+    job_id = create_job("posts", data.model_dump())
+    start_job(job_id)
+    return get_job(job_id)
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+def get_job_status(job_id: str, current_user: User = Depends(get_current_admin_user)):
+    return _job_or_404(job_id)
+
+
+@router.post("/jobs/{job_id}/resume", response_model=Job, status_code=status.HTTP_202_ACCEPTED)
+def resume_job(job_id: str, current_user: User = Depends(get_current_admin_user)):
+    """Continue a failed or interrupted job from its last finished batch"""
+    job = _job_or_404(job_id)
+    if job["status"] == "done":
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Job already finished")
+    start_job(job_id)
+    return job
@@ -3,9 +3,15 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.user import User
-from ..schemas.auth import Token, LoginRequest
+from ..schemas.auth import Token, LoginRequest, RefreshRequest
 from ..schemas.user import UserCreate, UserResponse
 from ..core.security import verify_password, get_password_hash, create_access_token
+from ..core.autocomplete import add_username
+from ..core.cache import delete_keys, log_cache_error
+from ..core.tokens import (
+    RefreshTokenError, issue_refresh_token, rotate_refresh_token, revoke_refresh_token,
+    revoke_user_sessions, session_username
+)
 from ..config import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -33,6 +39,9 @@ def register(user_data: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    add_username(new_user.id, new_user.username)
+    # The id may have been probed before it existed
+    delete_keys(f"user:{new_user.id}")
     
     return new_user
 
@@ -51,10 +60,60 @@ def login(login_data: LoginRequest, db: Session = Depends(get_db)):
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
     
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user.id, "username": user.username},
-        expires_delta=access_token_expires
+    try:
+        refresh_token = issue_refresh_token(user.id)
+    except Exception as e:
+        # Still log in; the client just has to use its password again later
+        log_cache_error("refresh issue", e)
+        refresh_token = None
+    
+    return {
+        "access_token": _access_token(user.id, user.username),
+        "token_type": "bearer",
+        "refresh_token": refresh_token
+    }
+
+
+def _access_token(user_id: int, username: str) -> str:
+    return create_access_token(
+        data={"sub": user_id, "username": username},
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+
+@router.post("/refresh", response_model=Token)
+def refresh(refresh_data: RefreshRequest, db: Session = Depends(get_db)):
+    """Trade a refresh token for a new access token and a new refresh token"""
+    invalid = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Invalid refresh token",
+        headers={"WWW-Authenticate": "Bearer"},
     )
+    try:
+        user_id, refresh_token = rotate_refresh_token(refresh_data.refresh_token)
+    except RefreshTokenError:
+        raise invalid
+    except Exception as e:
+        log_cache_error("refresh rotate", e)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token refresh unavailable, please log in again"
+        )
+    
+    # Read per refresh (through a short cache) so renames reach new access tokens
+    username = session_username(db, user_id)
+    if username is None:
+        revoke_user_sessions(user_id)
+        raise invalid
     
-    return {"access_token": access_token, "token_type": "bearer"}
+    return {
+        "access_token": _access_token(user_id, username),
+        "token_type": "bearer",
+        "refresh_token": refresh_token
+    }
+
+
+@router.post("/logout")
+def logout(refresh_data: RefreshRequest):
+    revoke_refresh_token(refresh_data.refresh_token)
+    return {"message": "Logged out"}
@@ -1,10 +1,11 @@
-from typing import Generator, Optional
-from fastapi import Depends, HTTPException, status
+from typing import Generator, List, Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..core.security import decode_access_token
 from ..models.user import User
+from ..config import settings
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
@@ -68,4 +69,22 @@ def get_optional_current_user(
     if user_id is None:
         return None
     
-    return db.query(User).filter(User.id == user_id).first()
\ No newline at end of file
+    return db.query(User).filter(User.id == user_id).first()
+
+
+def get_batch_ids(ids: str = Query(..., description="Comma-separated ids")) -> List[int]:
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Ids must be integers")
+    
+    # Keep request order, drop duplicates
+    unique_ids = list(dict.fromkeys(parsed))
+    if not unique_ids:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No ids given")
+    if len(unique_ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {settings.MAX_BATCH_SIZE} ids per request"
+        )
+    return unique_ids
\ No newline at end of file
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, status
+from ..config import settings
+from ..models.user import User
+from ..schemas.media import ImageUpload
+from ..api.deps import get_current_active_user
+from ..core.images import InvalidImage, images_enabled, image_sizes, store_image
+
+router = APIRouter(prefix="/media", tags=["Media"])
+
+
+async def save_image_upload(file: UploadFile) -> str:
+    """Validate and store an uploaded image, returning its URL"""
+    if not images_enabled():
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Image uploads are not available"
+        )
+    
+    data = await file.read(settings.MAX_UPLOAD_SIZE + 1)
+    if len(data) > settings.MAX_UPLOAD_SIZE:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Images are limited to {settings.MAX_UPLOAD_SIZE // (1024 * 1024)} MB"
+        )
+    
+    try:
+        return await store_image(data)
+    except InvalidImage as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid image: {e}")
+
+
+@router.post("/images", response_model=ImageUpload, status_code=status.HTTP_201_CREATED)
+async def upload_image(file: UploadFile, current_user: User = Depends(get_current_active_user)):
+    """Upload an image, e.g. for a post's featured_image"""
+    url = await save_image_upload(file)
+    return ImageUpload(url=url, sizes=image_sizes(url))
@@ -1,12 +1,28 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import asyncio
+import json
+from typing import Dict, List, Optional, Tuple
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from ..database import get_db
+from ..config import settings
+from ..database import get_db, SessionLocal
 from ..models.user import User
 from ..models.post import Post, Comment, PostLike, Favorite
-from ..schemas.post import PostCreate, PostResponse, CommentCreate, CommentResponse
-from ..api.deps import get_current_active_user
-from ..core.cache import get_cache, set_cache, delete_cache
+from ..schemas.post import PostCreate, PostUpdate, PostResponse, PostList, PostBatch, CommentCreate, CommentResponse
+from ..api.deps import get_current_active_user, get_batch_ids
+from ..core.cache import (
+    get_cache, set_many_cache, get_encoded_cache, set_encoded_cache, read_through_many,
+    cache_exists, delete_keys, invalidate_tags
+)
+from ..core.compression import accepted_encodings, compress_variants, encoded_response
+from ..core.stats import (
+    POST_COUNT_FIELDS, bump_user_stat, reset_user_stats, get_post_counts, bump_post_count,
+    reset_post_counts, bump_published_posts_count, get_published_posts_count, estimate_count
+)
+from ..core.related import get_related_ids, mark_related_stale
+from ..core.events import post_event_broker, publish_post_event, TooManyConnections
+from ..core.warmer import record_feed_hit, request_feed_warm, warm_feed_cache
 
 router = APIRouter(prefix="/posts", tags=["Posts"])
 
@@ -14,6 +30,7 @@ router = APIRouter(prefix="/posts", tags=["Posts"])
 @router.post("/", response_model=PostResponse, status_code=status.HTTP_201_CREATED)
 def create_post(
     post_data: PostCreate,
+    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
@@ -21,15 +38,24 @@ def create_post(
         user_id=current_user.id,
         title=post_data.title,
         content=post_data.content,
+        excerpt=post_data.excerpt,
+        featured_image=post_data.featured_image,
         status="published"
     )
     
     db.add(new_post)
     db.commit()
     db.refresh(new_post)
+    bump_user_stat(current_user.id, "posts_count")
+    bump_published_posts_count()
+    mark_related_stale(new_post.id)
+    # The id may have been probed before it existed
+    delete_keys(_post_cache_key(new_post.id))
     
-    # Invalidate posts cache
-    delete_cache("posts:*")
+    # A new post shifts every feed page; rebuild the popular ones right away
+    invalidate_tags(FEED_TAG)
+    request_feed_warm()
+    background_tasks.add_task(warm_feed_cache, warm_posts_page)
     
     return PostResponse(
         **new_post.__dict__,
@@ -41,22 +67,92 @@ def create_post(
     )
 
 
-@router.get("/", response_model=List[PostResponse])
-def get_posts(
-    search: str = Query(None),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(20, le=100),
-    db: Session = Depends(get_db)
-):
-    # Create cache key
-    cache_key = f"posts:search:{search}:skip:{skip}:limit:{limit}"
+def _post_cache_key(post_id: int) -> str:
+    return f"post:{post_id}"
+
+
+# Cache tags: every feed/search id list carries FEED_TAG, search lists also
+# SEARCH_TAG since an edit can change what matches, and post cards carry
+# their author's id since they show the username (see invalidate_tags).
+# Encoded pages carry their list's tags plus each card's post and user tags
+FEED_TAG = "feed"
+SEARCH_TAG = "search"
+
+
+def _list_tags(search: Optional[str]) -> List[str]:
+    return [FEED_TAG, SEARCH_TAG] if search else [FEED_TAG]
+
+
+def hydrate_posts(db: Session, posts: List[Post]) -> List[PostResponse]:
+    """Build responses for many posts with one query per related table"""
+    if not posts:
+        return []
     
-    # Try to get from cache
-    cached_data = get_cache(cache_key)
-    if cached_data:
-        return cached_data
+    authors = dict(
+        db.query(User.id, User.username).filter(User.id.in_({post.user_id for post in posts})).all()
+    )
+    counts = get_post_counts(db, [post.id for post in posts])
     
-    query = db.query(Post).filter(Post.status == "published")
+    return [
+        PostResponse(
+            **post.__dict__,
+            author_username=authors.get(post.user_id, "Unknown"),
+            **counts[post.id],
+            is_liked=False,
+            is_favorited=False
+        )
+        for post in posts
+    ]
+
+
+def _post_bodies(db: Session, ids: List[int]) -> Dict[int, dict]:
+    posts = db.query(Post).filter(Post.id.in_(ids)).all()
+    return {
+        response.id: response.model_dump(mode="json", exclude=set(POST_COUNT_FIELDS))
+        for response in hydrate_posts(db, posts)
+    }
+
+
+def _load_posts(db: Session, ids: List[int]) -> Dict[int, dict]:
+    """Post cards by id: cached bodies (one MGET) with the current counters overlaid"""
+    bodies = read_through_many(
+        ids, _post_cache_key, lambda missing_ids: _post_bodies(db, missing_ids),
+        ttl=settings.CACHE_TTL, tags=lambda body: [f"user:{body['user_id']}"]
+    )
+    counts = get_post_counts(db, list(bodies))
+    return {post_id: {**body, **counts[post_id]} for post_id, body in bodies.items()}
+
+
+def _posts_cache_key(search: Optional[str], skip: int, limit: int) -> str:
+    return f"posts:ids:search:{search}:skip:{skip}:limit:{limit}"
+
+
+def _encoded_page_key(search: Optional[str], skip: int, limit: int) -> str:
+    return f"posts:page:search:{search}:skip:{skip}:limit:{limit}"
+
+
+def _posts_total(
+    db: Session, query, search: Optional[str], skip: int, limit: int, found: int
+) -> Tuple[int, bool]:
+    """Total for a feed page as (count, exact) without a COUNT(*) per request"""
+    if found < limit and (found or not skip):
+        # Short page: everything up to here is all there is
+        return skip + found, True
+    if not search:
+        count = get_published_posts_count()
+        if count is not None:
+            return count, True
+    # Planner estimate; never less than what has been seen already
+    return max(estimate_count(db, query), skip + found), False
+
+
+def build_posts_page(db: Session, search: Optional[str], skip: int, limit: int) -> dict:
+    """Query a feed/search page's post ids and total, and cache them.
+    
+    Pages cache only ids; each card is cached once per post (see
+    assemble_posts_page), so editing a post leaves the pages alone.
+    """
+    query = db.query(Post.id).filter(Post.status == "published")
     
     # Full-text search
     if search:
@@ -66,46 +162,234 @@ def get_posts(
             (Post.content.ilike(search_filter))
         )
     
-    posts = query.order_by(Post.created_at.desc()).offset(skip).limit(limit).all()
-    result = []
-    for post in posts:
-        author = db.query(User).filter(User.id == post.user_id).first()
-        likes_count = db.query(PostLike).filter(PostLike.post_id == post.id).count()
-        comments_count = db.query(Comment).filter(Comment.post_id == post.id).count()
-        
-        post_data = PostResponse(
-            **post.__dict__,
-            author_username=author.username if author else "Unknown",
-            likes_count=likes_count,
-            comments_count=comments_count,
-            is_liked=False,
-            is_favorited=False
-        )
-        result.append(post_data)
+    ids = [post_id for post_id, in query.order_by(Post.created_at.desc()).offset(skip).limit(limit)]
+    total, exact = _posts_total(db, query, search, skip, limit, len(ids))
+    page = {"ids": ids, "total": total, "exact": exact}
     
     # Cache the result (5 minutes)
-    set_cache(cache_key, [p.dict() for p in result], ttl=300)
+    key = _posts_cache_key(search, skip, limit)
+    set_many_cache({key: page}, ttl=300, tags={key: _list_tags(search)})
     
-    return result
+    return page
+
+
+def assemble_posts_page(db: Session, page: dict, skip: int, limit: int) -> dict:
+    """PostList envelope for a cached id list, loading only the uncached cards"""
+    cards = _load_posts(db, page["ids"])
+    total = page["total"]
+    return {
+        # Posts deleted since the ids were cached are left out
+        "items": [cards[post_id] for post_id in page["ids"] if post_id in cards],
+        "total": total,
+        "exact": page["exact"],
+        "page": skip // limit + 1,
+        "page_size": limit,
+        "pages": -(-total // limit)
+    }
+
+
+def encode_posts_page(db: Session, search: Optional[str], skip: int, limit: int) -> Dict[str, bytes]:
+    """Assemble a feed page and cache it briefly in every encoding.
+
+    Compressing once per FEED_PAGE_CACHE_TTL instead of per request keeps
+    cache hits free of compression work.
+    """
+    page = get_cache(_posts_cache_key(search, skip, limit)) or build_posts_page(db, search, skip, limit)
+    body = assemble_posts_page(db, page, skip, limit)
+    variants = compress_variants(json.dumps(body).encode())
+    tags = _list_tags(search) + [f"post:{item['id']}" for item in body["items"]]
+    tags += sorted({f"user:{item['user_id']}" for item in body["items"]})
+    set_encoded_cache(
+        _encoded_page_key(search, skip, limit), variants, ttl=settings.FEED_PAGE_CACHE_TTL, tags=tags
+    )
+    return variants
+
+
+def warm_posts_page(db: Session, search: Optional[str], skip: int, limit: int):
+    """Rebuild a feed page (id list, cards and encoded body) unless it is cached"""
+    if not cache_exists(_encoded_page_key(search, skip, limit)):
+        encode_posts_page(db, search, skip, limit)
+
+
+@router.get("/", response_model=PostList)
+def get_posts(
+    request: Request,
+    search: str = Query(None),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    record_feed_hit(search, skip, limit)
+    encodings = accepted_encodings(request.headers.get("accept-encoding", ""))
+    
+    # Try to get from cache, already encoded the way the client wants
+    cached = get_encoded_cache(_encoded_page_key(search, skip, limit), encodings)
+    if cached:
+        return encoded_response(cached[1], cached[0])
+    
+    variants = encode_posts_page(db, search, skip, limit)
+    encoding = next(encoding for encoding in encodings if encoding in variants)
+    return encoded_response(variants[encoding], encoding)
+
+
+@router.get("/batch", response_model=PostBatch)
+def get_posts_batch(
+    ids: List[int] = Depends(get_batch_ids),
+    db: Session = Depends(get_db)
+):
+    found = _load_posts(db, ids)
+    return {
+        "items": [found[post_id] for post_id in ids if post_id in found],
+        "missing": [post_id for post_id in ids if post_id not in found]
+    }
 
 
 @router.get("/{post_id}", response_model=PostResponse)
 def get_post(post_id: int, db: Session = Depends(get_db)):
+    post = _load_posts(db, [post_id]).get(post_id)
+    if not post:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    return post
+
+
+@router.get("/{post_id}/related", response_model=List[PostResponse])
+def get_related_posts(post_id: int, db: Session = Depends(get_db)):
+    """Precomputed related posts, best first; empty until refresh_related.py has run"""
+    related_ids = get_related_ids(post_id)
+    if not related_ids:
+        return []
+    found = _load_posts(db, related_ids)
+    # Lists can outlive posts deleted since the last refresh; skip those
+    return [found[related_id] for related_id in related_ids if related_id in found]
+
+
+def _get_own_post(db: Session, post_id: int, user: User) -> Post:
     post = db.query(Post).filter(Post.id == post_id).first()
     if not post:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    if post.user_id != user.id and not user.is_admin:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not enough permissions")
+    return post
+
+
+def _invalidate_post(
+    post_id: int, background_tasks: BackgroundTasks, removed: bool = False, text_changed: bool = False
+):
+    """Drop the post's card and the pages showing it.
+
+    Feed id lists only change on removal; search lists also change when the
+    title or content does, as the post may start or stop matching.
+    """
+    delete_keys(_post_cache_key(post_id))
+    tags = [f"post:{post_id}"]
+    if removed:
+        tags.append(FEED_TAG)
+    elif text_changed:
+        tags.append(SEARCH_TAG)
+    invalidate_tags(*tags)
+    if removed:
+        request_feed_warm()
+        background_tasks.add_task(warm_feed_cache, warm_posts_page)
+
+
+@router.put("/{post_id}", response_model=PostResponse)
+def update_post(
+    post_id: int,
+    post_data: PostUpdate,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    post = _get_own_post(db, post_id, current_user)
+    changes = post_data.model_dump(exclude_unset=True)
+    text_changed = any(
+        field in changes and changes[field] != getattr(post, field) for field in ("title", "content")
+    )
+    for field, value in changes.items():
+        setattr(post, field, value)
     
-    author = db.query(User).filter(User.id == post.user_id).first()
-    likes_count = db.query(PostLike).filter(PostLike.post_id == post.id).count()
-    comments_count = db.query(Comment).filter(Comment.post_id == post.id).count()
+    db.commit()
+    db.refresh(post)
+    _invalidate_post(post.id, background_tasks, text_changed=text_changed)
+    mark_related_stale(post.id)
     
-    return PostResponse(
-        **post.__dict__,
-        author_username=author.username if author else "Unknown",
-        likes_count=likes_count,
-        comments_count=comments_count,
-        is_liked=False,
-        is_favorited=False
+    return hydrate_posts(db, [post])[0]
+
+
+@router.delete("/{post_id}", status_code=status.HTTP_200_OK)
+def delete_post(
+    post_id: int,
+    background_tasks: BackgroundTasks,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    post = _get_own_post(db, post_id, current_user)
+    was_published = post.status == "published"
+    # Their counters lose this post's comments/favorites; recount on next read
+    affected_users = {post.user_id}
+    affected_users.update(
+        user_id for user_id, in db.query(Comment.user_id).filter(Comment.post_id == post.id).distinct()
+    )
+    affected_users.update(
+        user_id for user_id, in db.query(Favorite.user_id).filter(Favorite.post_id == post.id).distinct()
+    )
+    
+    db.delete(post)
+    db.commit()
+    reset_user_stats(*affected_users)
+    reset_post_counts(post_id)
+    if was_published:
+        bump_published_posts_count(-1)
+    _invalidate_post(post_id, background_tasks, removed=True)
+    
+    return {"message": "Post deleted"}
+
+
+def _publish_likes_count(db: Session, post_id: int):
+    likes_count = db.query(PostLike).filter(PostLike.post_id == post_id).count()
+    publish_post_event(post_id, "likes", {"post_id": post_id, "likes_count": likes_count})
+
+
+def _post_exists(post_id: int) -> bool:
+    # Own short-lived session: a streaming response must not hold a pooled connection
+    db = SessionLocal()
+    try:
+        return db.query(Post.id).filter(Post.id == post_id).first() is not None
+    finally:
+        db.close()
+
+
+@router.get("/{post_id}/events")
+async def stream_post_events(post_id: int):
+    """Server-Sent Events stream of new comments and like count changes"""
+    if not await run_in_threadpool(_post_exists, post_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Post not found")
+    
+    try:
+        queue = post_event_broker.subscribe(post_id)
+    except TooManyConnections as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    async def event_stream():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    frame = await asyncio.wait_for(queue.get(), timeout=settings.SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": ping\n\n"
+                    continue
+                if frame is None:
+                    break
+                yield frame
+        finally:
+            post_event_broker.unsubscribe(post_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
     )
 
 
@@ -130,6 +414,10 @@ def like_post(
     new_like = PostLike(post_id=post_id, user_id=current_user.id)
     db.add(new_like)
     db.commit()
+    bump_post_count(post_id, "likes_count")
+    bump_user_stat(post.user_id, "likes_received_count")
+    mark_related_stale(post_id)
+    _publish_likes_count(db, post_id)
     
     return {"message": "Post liked"}
 
@@ -148,8 +436,13 @@ def unlike_post(
     if not like:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Like not found")
     
+    author_id = db.query(Post.user_id).filter(Post.id == post_id).scalar()
     db.delete(like)
     db.commit()
+    bump_post_count(post_id, "likes_count", -1)
+    bump_user_stat(author_id, "likes_received_count", -1)
+    mark_related_stale(post_id)
+    _publish_likes_count(db, post_id)
     
     return {"message": "Post unliked"}
 
@@ -175,6 +468,7 @@ def favorite_post(
     new_favorite = Favorite(post_id=post_id, user_id=current_user.id)
     db.add(new_favorite)
     db.commit()
+    bump_user_stat(current_user.id, "favorites_count")
     
     return {"message": "Post favorited"}
 
@@ -195,6 +489,7 @@ def unfavorite_post(
     
     db.delete(favorite)
     db.commit()
+    bump_user_stat(current_user.id, "favorites_count", -1)
     
     return {"message": "Post unfavorited"}
 
@@ -236,8 +531,13 @@ def create_comment(
     db.add(new_comment)
     db.commit()
     db.refresh(new_comment)
+    bump_post_count(post_id, "comments_count")
+    bump_user_stat(current_user.id, "comments_count")
     
-    return CommentResponse(
+    comment = CommentResponse(
         **new_comment.__dict__,
         author_username=current_user.username
-    )
\ No newline at end of file
+    )
+    publish_post_event(post_id, "comment", comment.model_dump(mode="json"))
+    
+    return comment
\ No newline at end of file
@@ -1,21 +1,44 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Dict, List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models.user import User
 from ..models.post import Post, Favorite, PostLike, Comment
-from ..schemas.user import UserResponse
+from ..config import settings
+from ..schemas.user import UserResponse, UserBatch, UserProfile, UserSuggestion
 from ..schemas.post import PostResponse
-from ..api.deps import get_current_active_user
+from ..api.deps import get_current_active_user, get_batch_ids
+from ..api.media import save_image_upload
+from ..core.cache import read_through_many, delete_keys, invalidate_tags
+from ..core.stats import get_user_stats
+from ..core.export import SITE_TABLES, export_lines, export_response
+from ..core.autocomplete import add_username, remove_username, suggest_usernames
+from ..core.tokens import forget_session_user
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
 
+def _user_cache_key(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
 @router.get("/me", response_model=UserResponse)
 def get_current_user_profile(current_user: User = Depends(get_current_active_user)):
     return current_user
 
 
+@router.get("/me/profile", response_model=UserProfile)
+def get_current_user_stats(
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Own profile with the same cached counters as /users/{id}/profile"""
+    user = UserResponse.model_validate(current_user).model_dump(mode="json")
+    return {**user, **get_user_stats(db, current_user.id)}
+
+
 @router.put("/me", response_model=UserResponse)
 def update_profile(
     username: str = None,
@@ -24,6 +47,7 @@ def update_profile(
     current_user: User = Depends(get_current_active_user),
     db: Session = Depends(get_db)
 ):
+    old_username = current_user.username
     if username:
         existing = db.query(User).filter(User.username == username, User.id != current_user.id).first()
         if existing:
@@ -41,7 +65,33 @@ def update_profile(
     
     db.commit()
     db.refresh(current_user)
+    delete_keys(_user_cache_key(current_user.id))
     
+    if current_user.username != old_username:
+        remove_username(current_user.id, old_username)
+        add_username(current_user.id, current_user.username)
+        forget_session_user(current_user.id)
+        # Cached posts and feed pages show the author's name
+        invalidate_tags(f"user:{current_user.id}")
+    
+    return current_user
+
+
+def _set_avatar(db: Session, user: User, url: str):
+    user.avatar_url = url
+    db.commit()
+    db.refresh(user)
+    delete_keys(_user_cache_key(user.id))
+
+
+@router.put("/me/avatar", response_model=UserResponse)
+async def upload_avatar(
+    file: UploadFile,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    url = await save_image_upload(file)
+    await run_in_threadpool(_set_avatar, db, current_user, url)
     return current_user
 
 
@@ -77,14 +127,63 @@ def get_my_favorites(
     return result
 
 
+@router.get("/me/export")
+def export_my_data(request: Request, current_user: User = Depends(get_current_active_user)):
+    """Download your profile, posts, comments, likes and favorites as NDJSON"""
+    return export_response(
+        request,
+        export_lines(SITE_TABLES, user_id=current_user.id),
+        f"mostinger-{current_user.id}.ndjson"
+    )
+
+
+@router.get("/autocomplete", response_model=List[UserSuggestion])
+def autocomplete_users(
+    q: str = Query(..., min_length=1, max_length=50),
+    limit: int = Query(10, ge=1, le=20),
+    db: Session = Depends(get_db)
+):
+    return suggest_usernames(db, q, limit)
+
+
+def _load_users(db: Session, ids: List[int]) -> Dict[int, dict]:
+    """User responses by id, from cache or one batched query"""
+    def load(missing_ids: List[int]) -> Dict[int, dict]:
+        users = db.query(User).filter(User.id.in_(missing_ids)).all()
+        return {user.id: UserResponse.model_validate(user).model_dump(mode="json") for user in users}
+    
+    return read_through_many(ids, _user_cache_key, load, ttl=settings.CACHE_TTL)
+
+
+@router.get("/batch", response_model=UserBatch)
+def get_users_batch(
+    ids: List[int] = Depends(get_batch_ids),
+    db: Session = Depends(get_db)
+):
+    found = _load_users(db, ids)
+    return {
+        "items": [found[user_id] for user_id in ids if user_id in found],
+        "missing": [user_id for user_id in ids if user_id not in found]
+    }
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+    user = _load_users(db, [user_id]).get(user_id)
     if not user:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
     return user
 
 
+@router.get("/{user_id}/profile", response_model=UserProfile)
+def get_user_profile(user_id: int, db: Session = Depends(get_db)):
+    user = _load_users(db, [user_id]).get(user_id)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
+    
+    return {**user, **get_user_stats(db, user_id)}
+
+
 @router.get("/{user_id}/posts", response_model=List[PostResponse])
 def get_user_posts(
     user_id: int,
@@ -116,18 +215,23 @@ def get_user_posts(
 @router.get("/", response_model=List[UserResponse])
 def search_users(
     search: str = None,
-    skip: int = 0,
-    limit: int = 20,
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, le=100),
     db: Session = Depends(get_db)
 ):
     query = db.query(User)
     
     if search:
-        search_filter = f"%{search}%"
+        # Username only (emails are private). Substring and fuzzy (%) matches
+        # are both served by the pg_trgm index
         query = query.filter(
-            (User.username.ilike(search_filter)) |
-            (User.email.ilike(search_filter))
+            User.username.ilike(f"%{search}%") | User.username.op("%")(search)
+        ).order_by(
+            func.similarity(User.username, search).desc(),
+            User.id
         )
+    else:
+        query = query.order_by(User.id)
     
     users = query.offset(skip).limit(limit).all()
     return users
\ No newline at end of file
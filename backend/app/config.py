@@ -10,15 +10,91 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "postgresql://postgres:postgres@db:5432/mostinger"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
     
     # Redis
     REDIS_URL: str = "redis://redis:6379/0"
+    REDIS_WARM_CONNECTIONS: int = 10
+    REDIS_SOCKET_TIMEOUT: float = 0.2
+    REDIS_CONNECT_TIMEOUT: float = 0.2
+    # Consecutive failures before Redis is skipped, and for how long (seconds)
+    REDIS_BREAKER_THRESHOLD: int = 5
+    REDIS_BREAKER_COOLDOWN: float = 10.0
+    # At most one log line per cache operation per interval (seconds)
+    CACHE_ERROR_LOG_INTERVAL: float = 30.0
     CACHE_TTL: int = 300
+    # Assembled feed pages, kept pre-compressed; their like and comment
+    # counts can lag by this much (edits and deletes invalidate them)
+    FEED_PAGE_CACHE_TTL: int = 30
+    # Remembers ids that don't exist, so repeated 404s skip the database
+    NEGATIVE_CACHE_TTL: int = 30
+    CACHE_WARM_TOP_N: int = 20
+    CACHE_WARM_TRACKED: int = 500
+    # Longer searches are served but not tracked for warming
+    CACHE_WARM_MAX_SEARCH: int = 100
+    CACHE_WARM_DELAY: float = 0.05
+    CACHE_WARM_LOCK_TTL: int = 60
+    USER_STATS_TTL: int = 86400
+    POST_COUNTS_TTL: int = 86400
+    # Creates and deletes keep it exact; expiry only bounds drift from missed bumps
+    SITE_STATS_TTL: int = 7 * 86400
+    # Must outlast the slowest counter recount (see app/core/stats.py)
+    STATS_VERSION_TTL: int = 300
+    # Must outlast the slowest read-through load (see read_through_many)
+    CACHE_VERSION_TTL: int = 300
+    # Lock and scratch-set lifetime for an autocomplete rebuild, extended per chunk
+    AUTOCOMPLETE_REBUILD_TTL: int = 120
+    
+    # Startup: run the hot feed queries once before reporting ready
+    PRECOMPILE_QUERIES: bool = True
+    
+    # Live post events (Server-Sent Events)
+    SSE_MAX_CONNECTIONS: int = 1000
+    SSE_MAX_CONNECTIONS_PER_POST: int = 200
+    SSE_QUEUE_SIZE: int = 32
+    SSE_HEARTBEAT_SECONDS: int = 15
     
     # JWT
     SECRET_KEY: str = "your-secret-key-change-in-production"
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    # How long /api/auth/refresh trusts a cached active flag and username (seconds)
+    USER_ACTIVE_CACHE_TTL: int = 300
+    
+    # Uploaded images; nginx serves MEDIA_ROOT at MEDIA_URL
+    MEDIA_ROOT: str = "/srv/media"
+    MEDIA_URL: str = "/media"
+    MAX_UPLOAD_SIZE: int = 10 * 1024 * 1024
+    MAX_IMAGE_PIXELS: int = 40_000_000
+    # Variant name -> longest side in pixels
+    IMAGE_SIZES: dict = {"thumb": 320, "medium": 960}
+    IMAGE_WORKERS: int = 2
+    
+    # Per-request profiling (SQL vs Python time) for triage; requests are
+    # profiled when an admin sends "X-Profile: 1" or at the sample rate
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.0
+    PROFILING_BUFFER_SIZE: int = 100
+    PROFILING_TOP_FUNCTIONS: int = 20
+    
+    # Admin bulk moderation jobs: rows per delete batch, pause between batches
+    JOB_BATCH_SIZE: int = 500
+    JOB_BATCH_DELAY: float = 0.05
+    JOB_LOCK_TTL: int = 60
+    JOB_TTL: int = 7 * 86400
+    
+    # Related posts (precomputed by refresh_related.py)
+    RELATED_POSTS_SIZE: int = 10
+    RELATED_POSTS_TTL: int = 14 * 86400
+    RELATED_TEXT_WEIGHT: float = 0.6
+    RELATED_LIKES_WEIGHT: float = 0.4
+    RELATED_MAX_TERMS: int = 24
+    RELATED_MAX_LIKERS: int = 500
+    
+    # Responses smaller than this are sent uncompressed
+    GZIP_MINIMUM_SIZE: int = 1000
     
     # CORS
     BACKEND_CORS_ORIGINS: list = ["http://localhost:3000", "http://localhost:8000"]
@@ -26,6 +102,7 @@ class Settings(BaseSettings):
     # Pagination
     DEFAULT_PAGE_SIZE: int = 20
     MAX_PAGE_SIZE: int = 100
+    MAX_BATCH_SIZE: int = 100
     
     class Config:
         env_file = ".env"
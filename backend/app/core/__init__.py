@@ -1,7 +1,12 @@
 from .security import verify_password, get_password_hash, create_access_token, decode_access_token
-from .cache import get_cache, set_cache, delete_cache
+from .cache import (
+    get_cache, set_cache, get_many_cache, set_many_cache, get_encoded_cache, set_encoded_cache,
+    read_through_many, cache_exists, delete_keys, invalidate_tags, delete_cache
+)
 
 __all__ = [
     'verify_password', 'get_password_hash', 'create_access_token', 'decode_access_token',
-    'get_cache', 'set_cache', 'delete_cache'
+    'get_cache', 'set_cache', 'get_many_cache', 'set_many_cache',
+    'get_encoded_cache', 'set_encoded_cache', 'read_through_many', 'cache_exists',
+    'delete_keys', 'invalidate_tags', 'delete_cache'
 ]
@@ -0,0 +1,164 @@
+import threading
+import uuid
+from typing import List
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+from app.database import SessionLocal
+from app.models.user import User
+
+# All members share score 0, so the set is ordered lexicographically and a
+# prefix lookup is a single ZRANGEBYLEX. Members are "lowercase\0Original\0id".
+AUTOCOMPLETE_KEY = "users:autocomplete"
+LOCK_KEY = f"lock:{AUTOCOMPLETE_KEY}"
+REBUILD_CHUNK = 1000
+
+
+def _member(user_id: int, username: str) -> str:
+    return f"{username.lower()}\0{username}\0{user_id}"
+
+
+# Applies ARGV[1] (ZADD/ZREM) for member ARGV[2] to the live index, if it
+# exists, and to the one being rebuilt (named by the rebuild lock). The
+# rebuild set gets the rebuild TTL (ARGV[3]), so an add racing the final
+# rename can at worst leave a scratch set behind that expires.
+_UPDATE_INDEXES = """
+local rebuilding = redis.call('GET', KEYS[2])
+if ARGV[1] == 'ZADD' then
+    if redis.call('EXISTS', KEYS[1]) == 1 then
+        redis.call('ZADD', KEYS[1], 0, ARGV[2])
+    end
+    if rebuilding then
+        redis.call('ZADD', rebuilding, 0, ARGV[2])
+        redis.call('EXPIRE', rebuilding, ARGV[3])
+    end
+else
+    redis.call('ZREM', KEYS[1], ARGV[2])
+    if rebuilding then
+        redis.call('ZREM', rebuilding, ARGV[2])
+    end
+end
+return 0
+"""
+
+
+def _update_indexes(command: str, user_id: int, username: str):
+    get_redis().eval(
+        _UPDATE_INDEXES, 2, AUTOCOMPLETE_KEY, LOCK_KEY,
+        command, _member(user_id, username), settings.AUTOCOMPLETE_REBUILD_TTL
+    )
+
+
+def add_username(user_id: int, username: str):
+    """Add a user to the autocomplete index"""
+    try:
+        _update_indexes("ZADD", user_id, username)
+    except Exception as e:
+        log_cache_error("autocomplete add", e)
+
+
+def remove_username(user_id: int, username: str):
+    """Remove a user from the autocomplete index"""
+    try:
+        _update_indexes("ZREM", user_id, username)
+    except Exception as e:
+        log_cache_error("autocomplete remove", e)
+
+
+def rebuild_autocomplete(db: Session) -> bool:
+    """Load all active usernames into a fresh index and swap it in.
+
+    One rebuild runs at a time (returns False when another one holds the
+    lock). The set is built under its own key with a TTL, so an abandoned
+    rebuild cleans up after itself.
+    """
+    tmp_key = f"{AUTOCOMPLETE_KEY}:rebuild:{uuid.uuid4().hex}"
+    # The lock holds the set's name, so add/remove_username update it too
+    if not get_redis().set(LOCK_KEY, tmp_key, nx=True, ex=settings.AUTOCOMPLETE_REBUILD_TTL):
+        return False
+    try:
+        rows = db.query(User.id, User.username).filter(User.is_active == True)  # noqa: E712
+        chunk = {}
+        for user_id, username in rows.yield_per(REBUILD_CHUNK):
+            chunk[_member(user_id, username)] = 0
+            if len(chunk) >= REBUILD_CHUNK:
+                _add_chunk(tmp_key, chunk)
+                chunk = {}
+        if chunk:
+            _add_chunk(tmp_key, chunk)
+        if get_redis().exists(tmp_key):
+            pipe = get_redis().pipeline()
+            pipe.rename(tmp_key, AUTOCOMPLETE_KEY)
+            pipe.persist(AUTOCOMPLETE_KEY)
+            pipe.execute()
+        return True
+    finally:
+        try:
+            get_redis().delete(tmp_key)
+            if get_redis().get(LOCK_KEY) == tmp_key:
+                get_redis().delete(LOCK_KEY)
+        except Exception as e:
+            log_cache_error("autocomplete unlock", e)
+
+
+def _add_chunk(tmp_key: str, chunk: dict):
+    pipe = get_redis().pipeline()
+    pipe.zadd(tmp_key, chunk)
+    pipe.expire(tmp_key, settings.AUTOCOMPLETE_REBUILD_TTL)
+    pipe.expire(LOCK_KEY, settings.AUTOCOMPLETE_REBUILD_TTL)
+    pipe.execute()
+
+
+def _rebuild_in_background():
+    db = SessionLocal()
+    try:
+        rebuild_autocomplete(db)
+    except Exception as e:
+        log_cache_error("autocomplete rebuild", e)
+    finally:
+        db.close()
+
+
+def ensure_autocomplete():
+    """Rebuild the index off the request path if it is missing (startup, Redis flush)"""
+    try:
+        if get_redis().exists(AUTOCOMPLETE_KEY) or get_redis().exists(LOCK_KEY):
+            return
+    except Exception as e:
+        log_cache_error("autocomplete", e)
+        return
+    threading.Thread(target=_rebuild_in_background, daemon=True).start()
+
+
+def _suggest_from_db(db: Session, prefix: str, limit: int) -> List[dict]:
+    # The trigram index serves prefix ILIKE too. "_" is a username character,
+    # so wildcards are escaped to match what the Redis range would
+    escaped = prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    users = db.query(User.id, User.username).filter(
+        User.is_active == True,  # noqa: E712
+        User.username.ilike(f"{escaped}%", escape="\\")
+    ).order_by(User.username).limit(limit).all()
+    return [{"id": user_id, "username": username} for user_id, username in users]
+
+
+def suggest_usernames(db: Session, prefix: str, limit: int) -> List[dict]:
+    """Usernames starting with prefix (case-insensitive), alphabetically"""
+    prefix = prefix.lower()
+    try:
+        if not get_redis().exists(AUTOCOMPLETE_KEY):
+            ensure_autocomplete()
+            return _suggest_from_db(db, prefix, limit)
+        # Byte 0xff never occurs in UTF-8, so it sorts after every username
+        # with the prefix (a str "\xff" would be encoded as c3 bf instead)
+        low = f"[{prefix}".encode()
+        members = get_redis().zrangebylex(AUTOCOMPLETE_KEY, low, low + b"\xff", start=0, num=limit)
+    except Exception as e:
+        log_cache_error("autocomplete", e)
+        # Redis unavailable
+        return _suggest_from_db(db, prefix, limit)
+
+    suggestions = []
+    for member in members:
+        _, username, user_id = member.split("\0")
+        suggestions.append({"id": int(user_id), "username": username})
+    return suggestions
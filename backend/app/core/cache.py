@@ -1,36 +1,452 @@
 import redis
 import json
-from typing import Optional
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from redis.client import Pipeline
 from app.config import settings
 
-redis_client = redis.from_url(settings.REDIS_URL, decode_responses=True)
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(redis.ConnectionError):
+    """Raised instead of calling Redis while the breaker is open"""
+
+
+class CircuitBreaker:
+    """Skips Redis entirely for a cool-down after repeated failures.
+
+    After `threshold` consecutive connection errors or timeouts the breaker
+    opens and every call fails immediately. Once `cooldown` seconds pass a
+    single trial call is let through: success closes the breaker, failure
+    opens it for another cool-down. Any other error still means Redis
+    answered, so it counts as success; a trial that ends without either
+    (e.g. cancelled) just frees the slot for the next one.
+    """
+
+    CLOSED, HALF_OPEN, OPEN = 0, 1, 2
+
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self.trial_owner: Optional[int] = None
+        self.opens_total = 0
+        self.short_circuited_total = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> int:
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.trial_in_flight or time.monotonic() - self.opened_at >= self.cooldown:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if not self.trial_in_flight and time.monotonic() - self.opened_at >= self.cooldown:
+                self.trial_in_flight = True
+                self.trial_owner = threading.get_ident()
+                return True
+            self.short_circuited_total += 1
+            return False
+
+    def record_success(self):
+        if self.opened_at is None and not self.failures:
+            return
+        with self._lock:
+            if self.opened_at is not None:
+                logger.warning("Redis circuit breaker closed")
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or (self.opened_at is None and self.failures >= self.threshold):
+                if not self.trial_in_flight:
+                    self.opens_total += 1
+                    logger.warning(
+                        "Redis circuit breaker opened after %d failures", self.failures,
+                        extra={"breaker_cooldown": self.cooldown}
+                    )
+                self.opened_at = time.monotonic()
+                self.trial_in_flight = False
+
+    def end_trial(self):
+        """Free the trial slot if this thread holds it and it got no outcome"""
+        if self.trial_owner != threading.get_ident():
+            return
+        with self._lock:
+            if self.trial_owner == threading.get_ident():
+                self.trial_in_flight = False
+                self.trial_owner = None
+
+
+breaker = CircuitBreaker(settings.REDIS_BREAKER_THRESHOLD, settings.REDIS_BREAKER_COOLDOWN)
+
+
+def _guarded(call, *args, **kwargs):
+    if not breaker.allow():
+        raise CircuitOpenError("Redis circuit breaker is open")
+    try:
+        result = call(*args, **kwargs)
+    except (redis.ConnectionError, redis.TimeoutError):
+        breaker.record_failure()
+        raise
+    except Exception:
+        breaker.record_success()
+        raise
+    else:
+        breaker.record_success()
+        return result
+    finally:
+        breaker.end_trial()
+
+
+class GuardedPipeline(Pipeline):
+    def execute(self, raise_on_error=True):
+        return _guarded(super().execute, raise_on_error)
+
+
+class GuardedRedis(redis.Redis):
+    """Redis client whose commands and pipelines go through the circuit breaker"""
+
+    def execute_command(self, *args, **options):
+        return _guarded(super().execute_command, *args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return GuardedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
+_last_logged: Dict[str, float] = {}
+_suppressed: Dict[str, int] = {}
+
+
+def log_cache_error(operation: str, error: Exception):
+    """Log a Redis failure at most once per interval per operation"""
+    if isinstance(error, CircuitOpenError):
+        return  # expected while the breaker is open, already logged on opening
+    now = time.monotonic()
+    if now - _last_logged.get(operation, float("-inf")) < settings.CACHE_ERROR_LOG_INTERVAL:
+        _suppressed[operation] = _suppressed.get(operation, 0) + 1
+        return
+    _last_logged[operation] = now
+    logger.warning(
+        "Redis %s failed: %s", operation, error,
+        extra={
+            "cache_operation": operation,
+            "error_type": type(error).__name__,
+            "suppressed": _suppressed.pop(operation, 0),
+        }
+    )
+
+
+def breaker_metrics() -> Dict[str, int]:
+    return {
+        "redis_breaker_state": breaker.state,
+        "redis_breaker_opens_total": breaker.opens_total,
+        "redis_short_circuited_total": breaker.short_circuited_total,
+    }
+
+
+# Created on first use; see get_redis()
+_redis_client: Optional[redis.Redis] = None
+_redis_bytes_client: Optional[redis.Redis] = None
+
+
+def _connect(decode_responses: bool) -> redis.Redis:
+    return GuardedRedis.from_url(
+        settings.REDIS_URL,
+        decode_responses=decode_responses,
+        socket_timeout=settings.REDIS_SOCKET_TIMEOUT,
+        socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT,
+    )
+
+
+def get_redis() -> redis.Redis:
+    """Shared Redis client, created lazily.
+
+    Short socket timeouts make a slow Redis fail fast; the breaker then
+    keeps requests from waiting on it at all.
+    """
+    global _redis_client
+    if _redis_client is None:
+        _redis_client = _connect(decode_responses=True)
+    return _redis_client
+
+
+def get_redis_bytes() -> redis.Redis:
+    """Like get_redis() but returns raw bytes, for compressed bodies"""
+    global _redis_bytes_client
+    if _redis_bytes_client is None:
+        _redis_bytes_client = _connect(decode_responses=False)
+    return _redis_bytes_client
+
+
+def warm_redis_pool():
+    """Open a few pooled Redis connections before serving"""
+    pool = get_redis().connection_pool
+    connections = [pool.get_connection("PING") for _ in range(settings.REDIS_WARM_CONNECTIONS)]
+    for connection in connections:
+        pool.release(connection)
+
+
+def redis_available() -> bool:
+    """Whether Redis answers; False without asking while the breaker is open"""
+    if breaker.state == CircuitBreaker.OPEN:
+        return False
+    try:
+        get_redis().ping()
+        return True
+    except Exception as e:
+        log_cache_error("ping", e)
+        return False
+
+
+def close_redis():
+    global _redis_client, _redis_bytes_client
+    for client in (_redis_client, _redis_bytes_client):
+        if client is not None:
+            client.close()
+    _redis_client = None
+    _redis_bytes_client = None
 
 
 def get_cache(key: str) -> Optional[dict]:
     """Get cached data"""
     try:
-        data = redis_client.get(key)
+        data = get_redis().get(key)
         if data:
             return json.loads(data)
         return None
     except Exception as e:
-        print(f"Cache get error: {e}")
+        log_cache_error("get", e)
         return None
 
 
 def set_cache(key: str, value: dict, ttl: int = 300):
     """Set cache with TTL (default 5 minutes)"""
     try:
-        redis_client.setex(key, ttl, json.dumps(value))
+        get_redis().setex(key, ttl, json.dumps(value))
+    except Exception as e:
+        log_cache_error("set", e)
+
+
+def get_many_cache(keys: List[str]) -> List[Optional[dict]]:
+    """Get several cached values in one round-trip (MGET)"""
+    if not keys:
+        return []
+    try:
+        return [json.loads(data) if data else None for data in get_redis().mget(keys)]
+    except Exception as e:
+        log_cache_error("mget", e)
+        return [None] * len(keys)
+
+
+def set_many_cache(
+    values: Dict[str, dict], ttl: int = 300, tags: Optional[Dict[str, List[str]]] = None
+):
+    """Set several keys with TTL in one pipeline, optionally tagging each key"""
+    if not values:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key, value in values.items():
+            pipe.setex(key, ttl, json.dumps(value))
+            _tag(pipe, key, (tags or {}).get(key, ()), ttl)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("mset", e)
+
+
+# Cached in place of an object that doesn't exist
+NEGATIVE_ENTRY = {"__missing__": True}
+
+# A read-through load can race a write: it reads the old row, the write
+# commits and deletes the key, then the load stores the old row back. So
+# every object key has a version key (KEYS[2]) that delete_keys advances,
+# and a load only stores if the version is still what it was before loading.
+
+# ARGV: version read before loading, TTL, value
+_STORE_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[3], 'EX', ARGV[2])
+return 1
+"""
+
+_DELETE = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 0
+"""
+
+
+def _version_key(key: str) -> str:
+    return f"{key}:version"
+
+
+def read_through_many(
+    ids: List[int],
+    key: Callable[[int], str],
+    load: Callable[[List[int]], Dict[int, dict]],
+    ttl: int = 300,
+    tags: Optional[Callable[[dict], List[str]]] = None
+) -> Dict[int, dict]:
+    """Cached objects by id, loading every miss with one call to load.
+
+    Ids that load doesn't return are cached as NEGATIVE_ENTRY for
+    NEGATIVE_CACHE_TTL and left out of the result, so probing missing ids
+    costs one lookup per TTL rather than a query each time. Loads are only
+    stored if no delete_keys ran meanwhile (see _STORE_IF_UNCHANGED).
+    """
+    if not ids:
+        return {}
+    keys = [key(object_id) for object_id in ids]
+    try:
+        # Objects and their versions in one round-trip
+        values = get_redis().mget(keys + [_version_key(object_key) for object_key in keys])
+        cached = [json.loads(data) if data else None for data in values[:len(keys)]]
+        versions = dict(zip(ids, [version or "0" for version in values[len(keys):]]))
+    except Exception as e:
+        log_cache_error("mget", e)
+        cached = [None] * len(keys)
+        versions = None  # unknown, so nothing loaded can be stored safely
+
+    found = {}
+    missing_ids = []
+    for object_id, data in zip(ids, cached):
+        if data is None:
+            missing_ids.append(object_id)
+        elif data != NEGATIVE_ENTRY:
+            found[object_id] = data
+    if not missing_ids:
+        return found
+
+    loaded = load(missing_ids)
+    found.update(loaded)
+    if versions is None:
+        return found
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for object_id in missing_ids:
+            object_key = key(object_id)
+            if object_id in loaded:
+                value, object_ttl = loaded[object_id], ttl
+            else:
+                value, object_ttl = NEGATIVE_ENTRY, settings.NEGATIVE_CACHE_TTL
+            pipe.eval(_STORE_IF_UNCHANGED, 2, object_key, _version_key(object_key),
+                      versions[object_id], object_ttl, json.dumps(value))
+            if object_id in loaded and tags:
+                _tag(pipe, object_key, tags(value), ttl)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("mset", e)
+    return found
+
+
+def get_encoded_cache(key: str, encodings: List[str]) -> Optional[Tuple[str, bytes]]:
+    """First of the given encodings stored under key, as (encoding, body)"""
+    try:
+        bodies = get_redis_bytes().hmget(key, encodings)
+    except Exception as e:
+        log_cache_error("hmget", e)
+        return None
+    for encoding, body in zip(encodings, bodies):
+        if body is not None:
+            return encoding, body
+    return None
+
+
+def set_encoded_cache(
+    key: str, variants: Dict[str, bytes], ttl: int = 300, tags: Iterable[str] = ()
+):
+    """Store a body in several encodings (see compress_variants) under one key"""
+    try:
+        pipe = get_redis_bytes().pipeline()
+        pipe.delete(key)
+        pipe.hset(key, mapping=variants)
+        pipe.expire(key, ttl)
+        _tag(pipe, key, tags, ttl)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("hset", e)
+
+
+def cache_exists(key: str) -> bool:
+    """Check whether key is cached"""
+    try:
+        return bool(get_redis().exists(key))
+    except Exception as e:
+        log_cache_error("exists", e)
+        return False
+
+
+def delete_keys(*keys: str):
+    """Delete exact keys, advancing their versions so no load in flight
+    stores the old value back (see read_through_many)"""
+    if not keys:
+        return
+    try:
+        pipe = get_redis().pipeline()
+        for key in keys:
+            pipe.eval(_DELETE, 2, key, _version_key(key), settings.CACHE_VERSION_TTL)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("delete", e)
+
+
+def _tag_key(tag: str) -> str:
+    return f"tag:{tag}"
+
+
+def _tag(pipe: Pipeline, key: str, tags: Iterable[str], ttl: int):
+    """Record key as a member of every tag set"""
+    for tag in tags:
+        pipe.sadd(_tag_key(tag), key)
+        # A tag set must outlive its members: set a TTL on new sets, only extend old ones
+        pipe.expire(_tag_key(tag), ttl, nx=True)
+        pipe.expire(_tag_key(tag), ttl, gt=True)
+
+
+# Atomic so a key tagged concurrently can't slip out of the set unseen
+_INVALIDATE_TAGS = """
+for _, tag in ipairs(KEYS) do
+    local members = redis.call('SMEMBERS', tag)
+    for i = 1, #members, 1000 do
+        redis.call('DEL', unpack(members, i, math.min(i + 999, #members)))
+    end
+    redis.call('DEL', tag)
+end
+return 0
+"""
+
+
+def invalidate_tags(*tags: str):
+    """Delete every cached key recorded under any of the tags"""
+    if not tags:
+        return
+    try:
+        get_redis().eval(_INVALIDATE_TAGS, len(tags), *[_tag_key(tag) for tag in tags])
     except Exception as e:
-        print(f"Cache set error: {e}")
+        log_cache_error("invalidate", e)
 
 
 def delete_cache(pattern: str):
     """Delete cache by pattern"""
     try:
-        keys = redis_client.keys(pattern)
+        keys = get_redis().keys(pattern)
         if keys:
-            redis_client.delete(*keys)
+            get_redis().delete(*keys)
     except Exception as e:
-        print(f"Cache delete error: {e}")
\ No newline at end of file
+        log_cache_error("delete", e)
\ No newline at end of file
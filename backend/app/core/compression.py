@@ -0,0 +1,74 @@
+import gzip
+from typing import Callable, Dict, List
+from fastapi.responses import Response
+from app.config import settings
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is always available
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip is always available
+    zstandard = None
+
+# Server preference when the client rates several encodings equally
+PREFERRED_ENCODINGS = ["br", "zstd", "gzip"]
+
+
+def _compressors() -> Dict[str, Callable[[bytes], bytes]]:
+    compressors = {"gzip": lambda body: gzip.compress(body, compresslevel=6, mtime=0)}
+    if brotli is not None:
+        compressors["br"] = lambda body: brotli.compress(body, quality=5)
+    if zstandard is not None:
+        # Compressor objects are not thread safe, so one per call
+        compressors["zstd"] = lambda body: zstandard.ZstdCompressor(level=3).compress(body)
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def compress_variants(body: bytes) -> Dict[str, bytes]:
+    """The raw body plus one compressed copy per available encoding"""
+    variants = {"identity": body}
+    if len(body) >= settings.GZIP_MINIMUM_SIZE:
+        for encoding, compress in COMPRESSORS.items():
+            variants[encoding] = compress(body)
+    return variants
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Encodings from an Accept-Encoding header we can serve, best first.
+
+    Always ends with "identity" so a lookup never comes back empty.
+    """
+    ratings = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        name = name.strip().lower()
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+        if name == "*":
+            for encoding in COMPRESSORS:
+                ratings.setdefault(encoding, quality)
+        elif name in COMPRESSORS:
+            ratings[name] = quality
+
+    accepted = [encoding for encoding in PREFERRED_ENCODINGS if ratings.get(encoding, 0) > 0]
+    accepted.sort(key=lambda encoding: -ratings[encoding])
+    return accepted + ["identity"]
+
+
+def encoded_response(body: bytes, encoding: str) -> Response:
+    """JSON response with an already encoded body; GZip middleware passes it through"""
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+from typing import Dict, Optional, Set
+import redis.asyncio as aioredis
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+
+CHANNEL_PREFIX = "events:post:"
+
+
+def publish_post_event(post_id: int, event: str, data: dict):
+    """Publish a per-post event to every worker"""
+    try:
+        get_redis().publish(f"{CHANNEL_PREFIX}{post_id}", json.dumps({"event": event, "data": data}))
+    except Exception as e:
+        log_cache_error("event publish", e)
+
+
+class TooManyConnections(Exception):
+    pass
+
+
+class PostEventBroker:
+    """Fans out Redis pub/sub post events to the clients of this worker.
+
+    The worker holds a single pattern subscription no matter how many clients
+    are connected. Every client gets a bounded queue; a client that falls
+    behind is disconnected (it reconnects and refetches) instead of letting
+    its backlog grow without limit.
+    """
+
+    def __init__(self, max_connections: int, max_per_post: int, queue_size: int):
+        self.max_connections = max_connections
+        self.max_per_post = max_per_post
+        self.queue_size = queue_size
+        self.connections = 0
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    def subscribe(self, post_id: int) -> asyncio.Queue:
+        if self.connections >= self.max_connections:
+            raise TooManyConnections("Too many open event streams")
+        queues = self._subscribers.setdefault(post_id, set())
+        if len(queues) >= self.max_per_post:
+            raise TooManyConnections("Too many open event streams for this post")
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        queues.add(queue)
+        self.connections += 1
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return queue
+
+    def unsubscribe(self, post_id: int, queue: asyncio.Queue):
+        queues = self._subscribers.get(post_id)
+        if not queues or queue not in queues:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[post_id]
+        self.connections -= 1
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        for queues in self._subscribers.values():
+            for queue in queues:
+                self._disconnect(queue)
+
+    def _dispatch(self, post_id: int, message: str):
+        queues = self._subscribers.get(post_id)
+        if not queues:
+            return
+
+        # Format the SSE frame once for all clients
+        payload = json.loads(message)
+        frame = f"event: {payload['event']}\ndata: {json.dumps(payload['data'])}\n\n"
+        for queue in list(queues):
+            try:
+                queue.put_nowait(frame)
+            except asyncio.QueueFull:
+                self.unsubscribe(post_id, queue)
+                self._disconnect(queue)
+
+    @staticmethod
+    def _disconnect(queue: asyncio.Queue):
+        # Drop the backlog and wake the client up with the close marker
+        while not queue.empty():
+            queue.get_nowait()
+        queue.put_nowait(None)
+
+    async def _listen(self):
+        while self.connections:
+            client = aioredis.from_url(
+                settings.REDIS_URL,
+                decode_responses=True,
+                socket_connect_timeout=settings.REDIS_CONNECT_TIMEOUT
+            )
+            pubsub = client.pubsub()
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}*")
+                while self.connections:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message and message["type"] == "pmessage":
+                        self._dispatch(int(message["channel"][len(CHANNEL_PREFIX):]), message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log_cache_error("event listener", e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+                await client.aclose()
+
+
+post_event_broker = PostEventBroker(
+    max_connections=settings.SSE_MAX_CONNECTIONS,
+    max_per_post=settings.SSE_MAX_CONNECTIONS_PER_POST,
+    queue_size=settings.SSE_QUEUE_SIZE,
+)
@@ -0,0 +1,100 @@
+import json
+import zlib
+from datetime import date, datetime
+from typing import Iterable, Iterator, List, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Table, select
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.post import Post, Comment, PostLike, Favorite
+from app.core.compression import accepted_encodings
+
+EXPORT_CHUNK = 1000
+# Flush compressed output to the client roughly this often
+FLUSH_BYTES = 64 * 1024
+
+# Never leave the database
+EXCLUDED_COLUMNS = {"password_hash", "search_vector"}
+
+# (record type, table) in dump order, parents before children
+SITE_TABLES = [
+    ("user", User.__table__),
+    ("post", Post.__table__),
+    ("comment", Comment.__table__),
+    ("like", PostLike.__table__),
+    ("favorite", Favorite.__table__),
+]
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _select(table: Table, user_id: Optional[int]):
+    columns = [column for column in table.c if column.name not in EXCLUDED_COLUMNS]
+    query = select(*columns).order_by(*table.primary_key.columns)
+    if user_id is not None:
+        owner = table.c.id if table is User.__table__ else table.c.user_id
+        query = query.where(owner == user_id)
+    return query
+
+
+def export_lines(tables: List[Tuple[str, Table]], user_id: Optional[int] = None) -> Iterator[bytes]:
+    """NDJSON lines for every row of the tables, optionally only one user's.
+
+    Rows come through a server-side cursor in chunks of EXPORT_CHUNK, so
+    memory use doesn't depend on the amount of data. Everything is read in
+    one REPEATABLE READ transaction, giving a consistent snapshot.
+    """
+    db = SessionLocal()
+    try:
+        conn = db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        for record_type, table in tables:
+            result = conn.execution_options(yield_per=EXPORT_CHUNK).execute(_select(table, user_id))
+            for row in result.mappings():
+                record = {"type": record_type, **row}
+                yield (json.dumps(record, default=_json_default) + "\n").encode()
+    finally:
+        db.close()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Compress a byte stream into a gzip stream as it is produced"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    pending = 0
+    for chunk in chunks:
+        pending += len(chunk)
+        data = compressor.compress(chunk)
+        if pending >= FLUSH_BYTES:
+            data += compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def _buffered(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    buffer = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= FLUSH_BYTES:
+            yield b"".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def export_response(request: Request, lines: Iterator[bytes], filename: str) -> StreamingResponse:
+    """Stream NDJSON as a download, gzipped on the fly when the client accepts it"""
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if "gzip" in accepted_encodings(request.headers.get("accept-encoding", "")):
+        headers["Content-Encoding"] = "gzip"
+        body = gzip_stream(lines)
+    else:
+        body = _buffered(lines)
+    return StreamingResponse(body, media_type="application/x-ndjson", headers=headers)
@@ -0,0 +1,161 @@
+import asyncio
+import hashlib
+import io
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional
+from app.config import settings
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # uploads are disabled without Pillow
+    Image = None
+
+# Pillow format name -> file extension for stored originals
+ORIGINAL_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp", "GIF": "gif"}
+VARIANT_FORMATS = {"webp": ("WEBP", {"quality": 80, "method": 4}),
+                   "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True})}
+VARIANT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+# Originals are re-encoded so uploaders' EXIF (GPS, camera serials) is never served
+ORIGINAL_SAVE_OPTIONS = {"JPEG": {"quality": 95}, "PNG": {"optimize": True},
+                         "WEBP": {"quality": 95}, "GIF": {"save_all": True}}
+
+_ORIGINAL_URL = re.compile(
+    rf"^{re.escape(settings.MEDIA_URL)}/original/[0-9a-f]{{2}}/(?P<digest>[0-9a-f]{{64}})\.\w+$"
+)
+
+# Created on first upload; see get_image_pool()
+_image_pool: Optional[ProcessPoolExecutor] = None
+
+
+class InvalidImage(ValueError):
+    pass
+
+
+def images_enabled() -> bool:
+    return Image is not None
+
+
+def get_image_pool() -> ProcessPoolExecutor:
+    """Worker processes for decoding and resizing, off the event loop"""
+    global _image_pool
+    if _image_pool is None:
+        _image_pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS)
+    return _image_pool
+
+
+def shutdown_image_pool():
+    global _image_pool
+    if _image_pool is not None:
+        _image_pool.shutdown(wait=False, cancel_futures=True)
+        _image_pool = None
+
+
+def _media_path(kind: str, digest: str, extension: str) -> str:
+    return os.path.join(settings.MEDIA_ROOT, kind, digest[:2], f"{digest}.{extension}")
+
+
+def _media_url(kind: str, digest: str, extension: str) -> str:
+    return f"{settings.MEDIA_URL}/{kind}/{digest[:2]}/{digest}.{extension}"
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _strip_metadata(data: bytes, image_format: str) -> bytes:
+    """Re-save an upload in its own format without EXIF/XMP, keeping orientation"""
+    with Image.open(io.BytesIO(data)) as original:
+        options = dict(ORIGINAL_SAVE_OPTIONS[image_format])
+        icc_profile = original.info.get("icc_profile")
+        if icc_profile:
+            options["icc_profile"] = icc_profile
+        # Animated GIFs keep their frames; GIF has no EXIF orientation anyway
+        image = original if image_format == "GIF" else ImageOps.exif_transpose(original)
+        buffer = io.BytesIO()
+        image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def _find_original(digest: str) -> Optional[str]:
+    for extension in ORIGINAL_FORMATS.values():
+        if os.path.exists(_media_path("original", digest, extension)):
+            return extension
+    return None
+
+
+def process_image(data: bytes, digest: str) -> str:
+    """Store an upload and render every size variant; runs in the image pool.
+
+    Returns the original's file extension. Raises InvalidImage for anything
+    Pillow can't decode or that isn't one of ORIGINAL_FORMATS.
+    """
+    Image.MAX_IMAGE_PIXELS = settings.MAX_IMAGE_PIXELS
+    try:
+        with Image.open(io.BytesIO(data)) as probe:
+            probe.verify()
+        image = Image.open(io.BytesIO(data))
+        image_format = image.format
+        # Pillow only raises DecompressionBombError past twice the limit
+        if image.width * image.height > settings.MAX_IMAGE_PIXELS:
+            raise Image.DecompressionBombError(f"{image.width}x{image.height}")
+        image.load()
+    except Image.DecompressionBombError:
+        raise InvalidImage("image dimensions are too large")
+    except (OSError, SyntaxError):
+        raise InvalidImage("not a readable image file")
+    if image_format not in ORIGINAL_FORMATS:
+        raise InvalidImage(f"unsupported format {image_format}")
+
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        has_alpha = "A" in image.getbands() or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+
+    for size, width in settings.IMAGE_SIZES.items():
+        variant = image.copy()
+        variant.thumbnail((width, width))
+        for name, (variant_format, options) in VARIANT_FORMATS.items():
+            frame = variant
+            if variant_format == "JPEG" and frame.mode == "RGBA":
+                frame = Image.new("RGB", variant.size, "white")
+                frame.paste(variant, mask=variant.getchannel("A"))
+            buffer = io.BytesIO()
+            frame.save(buffer, variant_format, **options)
+            _write_atomic(_media_path(size, digest, VARIANT_EXTENSIONS[name]), buffer.getvalue())
+
+    # Original last: its presence means every variant exists (see _find_original)
+    extension = ORIGINAL_FORMATS[image_format]
+    _write_atomic(_media_path("original", digest, extension), _strip_metadata(data, image_format))
+    return extension
+
+
+async def store_image(data: bytes) -> str:
+    """Save an uploaded image and its variants, returning the original's URL.
+
+    Identical uploads share files: they are keyed by the content hash and
+    only processed once.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    extension = _find_original(digest)
+    if extension is None:
+        future = get_image_pool().submit(process_image, data, digest)
+        extension = await asyncio.wrap_future(future)
+    return _media_url("original", digest, extension)
+
+
+def image_sizes(url: Optional[str]) -> Optional[Dict[str, Dict[str, str]]]:
+    """Per-size variant URLs for an uploaded image, None for external URLs"""
+    match = _ORIGINAL_URL.match(url or "")
+    if not match:
+        return None
+    digest = match.group("digest")
+    return {
+        size: {name: _media_url(size, digest, extension) for name, extension in VARIANT_EXTENSIONS.items()}
+        for size in settings.IMAGE_SIZES
+    }
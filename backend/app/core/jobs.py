@@ -0,0 +1,301 @@
+import json
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, NamedTuple, Optional
+from sqlalchemy import delete, exists, select, tuple_, update
+from sqlalchemy.orm import Session, aliased
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error, delete_keys, invalidate_tags
+from app.core.autocomplete import remove_username
+from app.core.stats import reset_user_stats, reset_post_counts, bump_published_posts_count
+from app.core.tokens import revoke_user_sessions
+from app.database import SessionLocal
+from app.models.user import User
+from app.models.post import Post, Comment, PostLike, Favorite
+
+logger = logging.getLogger(__name__)
+
+# Bulk moderation jobs. A job is a fixed list of steps; each step deletes
+# matching rows JOB_BATCH_SIZE at a time, committing after every batch so no
+# transaction holds locks on hot rows for long. What a batch deleted (from
+# RETURNING) is saved in Redis as "pending" before its commit and folded into
+# the progress after it, so an interrupted job resumes where it stopped and
+# counts every batch exactly once (see _settle_pending). Caches and counters
+# are fixed up once, in the final step.
+#   job:<id>          hash: kind, params, status, step, deleted, pending, ...
+#   job:<id>:posts    posts whose cached counts changed or that were deleted
+#   job:<id>:users    users whose profile counters changed
+
+
+class Step(NamedTuple):
+    name: str
+    table: object
+    condition: Callable
+    # (column, "posts" | "users") pairs collected from deleted rows
+    collect: tuple = ()
+
+
+def _posts_of(user_ids: List[int]):
+    return select(Post.id).where(Post.user_id.in_(user_ids)).scalar_subquery()
+
+
+def _comment_trees(user_ids: List[int]):
+    """Ids of the users' comments and of every reply below them, whoever wrote it"""
+    tree = select(Comment.id).where(Comment.user_id.in_(user_ids)).cte("comment_tree", recursive=True)
+    reply = aliased(Comment)
+    tree = tree.union_all(select(reply.id).where(reply.parent_comment_id == tree.c.id))
+    return select(tree.c.id).scalar_subquery()
+
+
+def _leaf_comments(condition):
+    # Replies go before their parents: deleting a parent would cascade
+    # (parent_comment_id ON DELETE CASCADE) to rows RETURNING never reports
+    reply = aliased(Comment)
+    return condition & ~exists().where(reply.parent_comment_id == Comment.id)
+
+
+def _content_steps(post_ids_clause: Callable) -> List[Step]:
+    """Delete what hangs off some posts, then the posts themselves"""
+    return [
+        Step("post_likes", PostLike.__table__, lambda p: PostLike.post_id.in_(post_ids_clause(p)),
+             ((PostLike.user_id, "users"),)),
+        Step("post_favorites", Favorite.__table__, lambda p: Favorite.post_id.in_(post_ids_clause(p)),
+             ((Favorite.user_id, "users"),)),
+        Step("post_comments", Comment.__table__,
+             lambda p: _leaf_comments(Comment.post_id.in_(post_ids_clause(p))),
+             ((Comment.user_id, "users"),)),
+        Step("posts", Post.__table__, lambda p: Post.id.in_(post_ids_clause(p)),
+             ((Post.id, "posts"), (Post.user_id, "users"))),
+    ]
+
+
+def _steps(kind: str, params: dict) -> List[Step]:
+    if kind == "posts":
+        return _content_steps(lambda p: p["post_ids"])
+    steps = []
+    if params["purge_content"]:
+        steps += [
+            Step("likes", PostLike.__table__, lambda p: PostLike.user_id.in_(p["user_ids"]),
+                 ((PostLike.post_id, "posts"),)),
+            Step("favorites", Favorite.__table__, lambda p: Favorite.user_id.in_(p["user_ids"]),
+                 ((Favorite.post_id, "posts"),)),
+            # Replies by other users go too, so their authors are collected
+            Step("comments", Comment.__table__,
+                 lambda p: _leaf_comments(Comment.id.in_(_comment_trees(p["user_ids"]))),
+                 ((Comment.post_id, "posts"), (Comment.user_id, "users"))),
+        ]
+        steps += _content_steps(lambda p: _posts_of(p["user_ids"]))
+    return steps
+
+
+def _step_names(kind: str, params: dict) -> List[str]:
+    names = [step.name for step in _steps(kind, params)] + ["finalize"]
+    if kind == "users" and params["deactivate"]:
+        names.insert(0, "deactivate")
+    return names
+
+
+def _job_key(job_id: str) -> str:
+    return f"job:{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    data = get_redis().hgetall(_job_key(job_id))
+    if not data:
+        return None
+    params = json.loads(data["params"])
+    return {
+        "id": job_id,
+        "kind": data["kind"],
+        "status": data["status"],
+        "params": params,
+        "step": data.get("step_name"),
+        "steps": _step_names(data["kind"], params),
+        "deleted": json.loads(data["deleted"]),
+        "error": data.get("error") or None,
+        "created_at": data["created_at"],
+        "updated_at": data["updated_at"],
+    }
+
+
+def create_job(kind: str, params: dict) -> str:
+    job_id = uuid.uuid4().hex
+    pipe = get_redis().pipeline()
+    pipe.hset(_job_key(job_id), mapping={
+        "kind": kind,
+        "params": json.dumps(params),
+        "status": "queued",
+        "step": 0,
+        "deleted": json.dumps({}),
+        "created_at": _now(),
+        "updated_at": _now(),
+    })
+    pipe.expire(_job_key(job_id), settings.JOB_TTL)
+    pipe.execute()
+    return job_id
+
+
+def start_job(job_id: str):
+    """Run (or resume) a job in a background thread"""
+    threading.Thread(target=run_job, args=(job_id,), daemon=True).start()
+
+
+def _save(job_id: str, **fields):
+    fields["updated_at"] = _now()
+    get_redis().hset(_job_key(job_id), mapping=fields)
+
+
+def _delete_batch(db: Session, step: Step, params: dict) -> Optional[dict]:
+    """Delete one batch without committing; returns what it deleted, None when done"""
+    primary_key = list(step.table.primary_key.columns)
+    batch = select(*primary_key).where(step.condition(params)).limit(settings.JOB_BATCH_SIZE)
+    if len(primary_key) == 1:
+        statement = delete(step.table).where(primary_key[0].in_(batch.scalar_subquery()))
+    else:
+        statement = delete(step.table).where(tuple_(*primary_key).in_(batch))
+    returning = primary_key + [column for column, _ in step.collect]
+    if step.table is Post.__table__:
+        returning.append(Post.status)
+    rows = db.execute(statement.returning(*returning)).all()
+    if not rows:
+        return None
+    width = len(primary_key)
+    return {
+        "keys": [list(row[:width]) for row in rows],
+        "collect": {
+            target: sorted({row[width + position] for row in rows})
+            for position, (_, target) in enumerate(step.collect)
+        },
+        "published": sum(row[-1] == "published" for row in rows) if step.table is Post.__table__ else 0,
+    }
+
+
+def _apply_batch(job_id: str, step: Step, batch: dict, deleted: Dict[str, int]):
+    """Fold a committed batch into the job's progress and clear it as pending"""
+    key = _job_key(job_id)
+    deleted[step.name] = deleted.get(step.name, 0) + len(batch["keys"])
+    pipe = get_redis().pipeline()
+    for target, ids in batch["collect"].items():
+        pipe.sadd(f"{key}:{target}", *ids)
+        pipe.expire(f"{key}:{target}", settings.JOB_TTL)
+    if batch["published"]:
+        pipe.hincrby(key, "published_deleted", batch["published"])
+    pipe.hset(key, mapping={"deleted": json.dumps(deleted), "updated_at": _now()})
+    pipe.hdel(key, "pending")
+    pipe.execute()
+
+
+def _settle_pending(db: Session, job_id: str, steps: List[Step], pending: dict, deleted: Dict[str, int]):
+    """Finish the batch an interrupted run left between its commit and its progress.
+
+    The batch is all or nothing, so if none of its rows are left it was
+    committed and is counted now; otherwise it was rolled back and is
+    simply dropped, to be deleted again by the next batch.
+    """
+    step = steps[pending["step"]]
+    primary_key = list(step.table.primary_key.columns)
+    keys = [tuple(key) for key in pending["keys"]]
+    if len(primary_key) == 1:
+        condition = primary_key[0].in_([key[0] for key in keys])
+    else:
+        condition = tuple_(*primary_key).in_(keys)
+    if db.execute(select(*primary_key).where(condition).limit(1)).first() is None:
+        _apply_batch(job_id, step, pending, deleted)
+    else:
+        get_redis().hdel(_job_key(job_id), "pending")
+
+
+def _deactivate(db: Session, user_ids: List[int]):
+    users = db.query(User.id, User.username).filter(User.id.in_(user_ids)).all()
+    db.execute(update(User).where(User.id.in_(user_ids)).values(is_active=False))
+    db.commit()
+    revoke_user_sessions(*user_ids)
+    for user_id, username in users:
+        remove_username(user_id, username)
+    delete_keys(*[f"user:{user_id}" for user_id in user_ids])
+
+
+def _finalize(db: Session, job_id: str, params: dict, published_deleted: int):
+    key = _job_key(job_id)
+    post_ids = {int(post_id) for post_id in get_redis().smembers(f"{key}:posts")}
+    user_ids = {int(user_id) for user_id in get_redis().smembers(f"{key}:users")}
+    user_ids.update(params.get("user_ids", []))
+    # Authors of surviving posts that lost likes, comments or favorites, and
+    # the encoded feed pages showing any of the posts (see app.api.posts)
+    ordered = sorted(post_ids)
+    for chunk_start in range(0, len(ordered), settings.JOB_BATCH_SIZE):
+        chunk = ordered[chunk_start:chunk_start + settings.JOB_BATCH_SIZE]
+        user_ids.update(user_id for user_id, in db.query(Post.user_id).filter(Post.id.in_(chunk)))
+        invalidate_tags(*[f"post:{post_id}" for post_id in chunk])
+
+    reset_user_stats(*user_ids)
+    if post_ids:
+        delete_keys(*[f"post:{post_id}" for post_id in post_ids])
+        reset_post_counts(*post_ids)
+    if published_deleted:
+        bump_published_posts_count(-published_deleted)
+        # Feed id lists (FEED_TAG in app.api.posts) may show deleted posts
+        invalidate_tags("feed")
+    get_redis().delete(f"{key}:posts", f"{key}:users")
+
+
+def run_job(job_id: str):
+    lock_key = f"lock:{_job_key(job_id)}"
+    if not get_redis().set(lock_key, 1, nx=True, ex=settings.JOB_LOCK_TTL):
+        return  # already running elsewhere
+
+    key = _job_key(job_id)
+    db = SessionLocal()
+    try:
+        data = get_redis().hgetall(key)
+        if not data or data["status"] == "done":
+            return
+        kind, params = data["kind"], json.loads(data["params"])
+        deleted: Dict[str, int] = json.loads(data["deleted"])
+        _save(job_id, status="running", error="")
+        steps = _steps(kind, params)
+        if data.get("pending"):
+            _settle_pending(db, job_id, steps, json.loads(data["pending"]), deleted)
+
+        if kind == "users" and params["deactivate"] and not data.get("deactivated"):
+            _save(job_id, step_name="deactivate")
+            _deactivate(db, params["user_ids"])
+            _save(job_id, deactivated=1)
+
+        for index in range(int(data["step"]), len(steps)):
+            step = steps[index]
+            _save(job_id, step=index, step_name=step.name)
+            while True:
+                batch = _delete_batch(db, step, params)
+                if batch is None:
+                    db.rollback()
+                    break
+                get_redis().hset(key, "pending", json.dumps(dict(batch, step=index)))
+                db.commit()
+                _apply_batch(job_id, step, batch, deleted)
+                get_redis().expire(lock_key, settings.JOB_LOCK_TTL)
+                time.sleep(settings.JOB_BATCH_DELAY)
+        _save(job_id, step=len(steps), step_name="finalize")
+
+        _finalize(db, job_id, params, int(get_redis().hget(key, "published_deleted") or 0))
+        _save(job_id, status="done")
+    except Exception as e:
+        logger.exception("Moderation job %s failed", job_id)
+        db.rollback()
+        try:
+            _save(job_id, status="failed", error=str(e))
+        except Exception:
+            pass
+    finally:
+        db.close()
+        try:
+            get_redis().delete(lock_key)
+        except Exception as e:
+            log_cache_error("job unlock", e)
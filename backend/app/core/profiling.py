@@ -0,0 +1,127 @@
+import cProfile
+import functools
+import inspect
+import json
+import os
+import pstats
+import socket
+import time
+from collections import deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+
+# Shared by every worker, newest first
+PROFILES_KEY = "profiles:recent"
+
+
+class RequestProfile:
+    """Timings collected for one profiled request"""
+
+    def __init__(self, method: str, path: str, reason: str):
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.started_at = datetime.now(timezone.utc)
+        self.sql_seconds = 0.0
+        self.sql_count = 0
+        # Only sync endpoints get cProfile; async ones share the event loop
+        self.profiler = cProfile.Profile()
+        self.profiled = False
+
+    def summary(self, total_seconds: float, status_code: int) -> dict:
+        functions = []
+        if self.profiled:
+            stats = pstats.Stats(self.profiler)
+            rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+            for (filename, line, name), (_, calls, own, cumulative, _) in rows[:settings.PROFILING_TOP_FUNCTIONS]:
+                functions.append({
+                    "function": f"{filename}:{line}({name})",
+                    "calls": calls,
+                    "own_ms": round(own * 1000, 3),
+                    "cumulative_ms": round(cumulative * 1000, 3),
+                })
+        return {
+            "method": self.method,
+            "path": self.path,
+            "status_code": status_code,
+            "reason": self.reason,
+            "worker": f"{socket.gethostname()}:{os.getpid()}",
+            "started_at": self.started_at.isoformat(),
+            "total_ms": round(total_seconds * 1000, 3),
+            "sql_ms": round(self.sql_seconds * 1000, 3),
+            "sql_count": self.sql_count,
+            "python_ms": round(max(total_seconds - self.sql_seconds, 0) * 1000, 3),
+            "functions": functions,
+        }
+
+
+# Set for the duration of a profiled request; contextvars follow the request
+# into the threadpool, where sync endpoints and their SQL run
+current_profile: ContextVar[Optional[RequestProfile]] = ContextVar("request_profile", default=None)
+
+# This worker's most recent profiles, newest last; only used while Redis is down
+profiles: deque = deque(maxlen=settings.PROFILING_BUFFER_SIZE)
+
+
+def record_profile(summary: dict):
+    """Keep a profile where any worker's /api/admin/profiles can see it"""
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.lpush(PROFILES_KEY, json.dumps(summary))
+        pipe.ltrim(PROFILES_KEY, 0, settings.PROFILING_BUFFER_SIZE - 1)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("profile store", e)
+        profiles.append(summary)
+
+
+def recent_profiles(limit: int) -> List[dict]:
+    """Newest profiles from every worker, or just this one's without Redis"""
+    try:
+        return [json.loads(data) for data in get_redis().lrange(PROFILES_KEY, 0, limit - 1)]
+    except Exception as e:
+        log_cache_error("profile list", e)
+        return list(profiles)[-limit:][::-1]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if current_profile.get() is not None:
+        conn.info.setdefault("profile_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = current_profile.get()
+    if profile is not None and conn.info.get("profile_query_start"):
+        profile.sql_seconds += time.perf_counter() - conn.info["profile_query_start"].pop()
+        profile.sql_count += 1
+
+
+def _profiled_call(call):
+    @functools.wraps(call)
+    def wrapper(**kwargs):
+        profile = current_profile.get()
+        if profile is None:
+            return call(**kwargs)
+        profile.profiled = True
+        profile.profiler.enable()
+        try:
+            return call(**kwargs)
+        finally:
+            profile.profiler.disable()
+    return wrapper
+
+
+def instrument(app):
+    """Hook SQL timing and wrap sync endpoints; only called when profiling is enabled"""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    for route in app.routes:
+        if isinstance(route, APIRoute) and not inspect.iscoroutinefunction(route.dependant.call):
+            route.dependant.call = _profiled_call(route.dependant.call)
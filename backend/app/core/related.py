@@ -0,0 +1,143 @@
+import json
+from typing import Iterable, List, Optional
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+from app.models.post import Post
+
+# Related posts are computed offline (refresh_related.py) and stored as a
+# short ranked list of ids, so serving them is one GET plus hydration:
+#   related:<post_id>   JSON list of at most RELATED_POSTS_SIZE post ids
+#   related:pending     posts whose list is stale (new, edited or liked)
+
+PENDING_KEY = "related:pending"
+
+REFRESH_CHUNK = 200
+
+# Two candidate sources, each normalized to 0..1 and weighted:
+#  - text: published posts matching the source's strongest terms (title terms
+#    first, then the most frequent), ranked with ts_rank; served by the GIN
+#    index on search_vector
+#  - co-likes: posts liked by the source's most recent likers
+_RELATED_SQL = text("""
+WITH terms AS (
+    SELECT string_agg(quote_literal(term.lexeme), ' | ')::tsquery AS query
+    FROM (
+        SELECT t.lexeme
+        FROM posts, unnest(posts.search_vector) AS t
+        WHERE posts.id = :post_id
+        ORDER BY 'A' = ANY(t.weights) DESC, cardinality(t.positions) DESC NULLS LAST, t.lexeme
+        LIMIT :max_terms
+    ) term
+), text_matches AS (
+    SELECT p.id, ts_rank(p.search_vector, terms.query) AS score
+    FROM posts p, terms
+    WHERE p.search_vector @@ terms.query AND p.id <> :post_id AND p.status = 'published'
+    ORDER BY score DESC
+    LIMIT :candidates
+), likers AS (
+    SELECT user_id FROM post_likes
+    WHERE post_id = :post_id
+    ORDER BY created_at DESC
+    LIMIT :max_likers
+), co_likes AS (
+    SELECT l.post_id AS id, count(*)::float AS score
+    FROM post_likes l
+    JOIN likers USING (user_id)
+    JOIN posts p ON p.id = l.post_id AND p.status = 'published'
+    WHERE l.post_id <> :post_id
+    GROUP BY l.post_id
+    ORDER BY score DESC
+    LIMIT :candidates
+), scored AS (
+    SELECT id, score / max(score) OVER () * :text_weight AS score FROM text_matches
+    UNION ALL
+    SELECT id, score / max(score) OVER () * :likes_weight AS score FROM co_likes
+)
+SELECT id FROM scored
+GROUP BY id
+ORDER BY sum(score) DESC, id DESC
+LIMIT :size
+""")
+
+
+def _related_key(post_id: int) -> str:
+    return f"related:{post_id}"
+
+
+def compute_related(db: Session, post_id: int) -> List[int]:
+    """Rank the posts most related to one post, best first"""
+    rows = db.execute(_RELATED_SQL, {
+        "post_id": post_id,
+        "max_terms": settings.RELATED_MAX_TERMS,
+        "max_likers": settings.RELATED_MAX_LIKERS,
+        "candidates": settings.RELATED_POSTS_SIZE * 5,
+        "text_weight": settings.RELATED_TEXT_WEIGHT,
+        "likes_weight": settings.RELATED_LIKES_WEIGHT,
+        "size": settings.RELATED_POSTS_SIZE,
+    })
+    return [related_id for related_id, in rows]
+
+
+def refresh_related(db: Session, post_ids: Iterable[int]) -> int:
+    """Recompute and store the related lists of some posts"""
+    refreshed = 0
+    pipe = get_redis().pipeline()
+    for post_id in post_ids:
+        pipe.set(_related_key(post_id), json.dumps(compute_related(db, post_id)),
+                 ex=settings.RELATED_POSTS_TTL)
+        refreshed += 1
+        if refreshed % REFRESH_CHUNK == 0:
+            pipe.execute()
+            db.rollback()  # end the read transaction between chunks
+    pipe.execute()
+    return refreshed
+
+
+def refresh_all_related(db: Session) -> int:
+    """Recompute every published post's list, walking ids in chunks"""
+    refreshed = 0
+    last_id = 0
+    while True:
+        ids = [post_id for post_id, in (
+            db.query(Post.id)
+            .filter(Post.status == "published", Post.id > last_id)
+            .order_by(Post.id)
+            .limit(REFRESH_CHUNK)
+        )]
+        if not ids:
+            return refreshed
+        refreshed += refresh_related(db, ids)
+        last_id = ids[-1]
+
+
+def refresh_pending_related(db: Session) -> int:
+    """Recompute the lists of posts marked stale since the last run"""
+    refreshed = 0
+    while True:
+        ids = [int(post_id) for post_id in get_redis().spop(PENDING_KEY, REFRESH_CHUNK)]
+        if not ids:
+            return refreshed
+        published = [post_id for post_id, in (
+            db.query(Post.id).filter(Post.id.in_(ids), Post.status == "published")
+        )]
+        refreshed += refresh_related(db, published)
+
+
+def mark_related_stale(*post_ids: int):
+    """Queue posts for the next incremental refresh"""
+    try:
+        get_redis().sadd(PENDING_KEY, *post_ids)
+    except Exception as e:
+        log_cache_error("related mark", e)
+
+
+def get_related_ids(post_id: int) -> Optional[List[int]]:
+    """The stored list for a post, None when it hasn't been computed"""
+    try:
+        cached = get_redis().get(_related_key(post_id))
+    except Exception as e:
+        log_cache_error("related get", e)
+        return None
+    return json.loads(cached) if cached is not None else None
@@ -0,0 +1,247 @@
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Query, Session
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+from app.models.post import Post, Comment, PostLike, Favorite
+
+STATS_FIELDS = ("posts_count", "favorites_count", "likes_received_count", "comments_count")
+
+# Counter hashes are filled from a database count and then bumped on writes.
+# A write that lands while a count is in flight must not be lost, so every
+# hash has a version key (KEYS[2]) that bumps and resets advance, and a
+# count is only stored if the version is still what it was before counting.
+
+# Only bump counters that are already cached; a missing hash is rebuilt from
+# the database on next read, so creating a partial one here would be wrong.
+_INCR_IF_EXISTS = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return redis.call('HINCRBY', KEYS[1], ARGV[1], ARGV[2])
+end
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[3])
+return nil
+"""
+
+# ARGV: version read before counting, TTL, then field/value pairs
+_SET_IF_UNCHANGED = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 3))
+redis.call('EXPIRE', KEYS[1], ARGV[2])
+return 1
+"""
+
+_RESET = """
+redis.call('DEL', KEYS[1])
+redis.call('INCR', KEYS[2])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return 0
+"""
+
+
+def _version_key(key: str) -> str:
+    return f"{key}:version"
+
+
+def _read_version(key: str) -> Optional[str]:
+    """Version of a counter hash, taken before counting; None if Redis is down"""
+    try:
+        return get_redis().get(_version_key(key)) or "0"
+    except Exception as e:
+        log_cache_error("stats get", e)
+        return None
+
+
+def _store_counts(key: str, version: Optional[str], counts: dict, ttl: int):
+    """Cache freshly counted values unless a write changed them meanwhile"""
+    _store_many([(key, version, counts)], ttl)
+
+
+def _store_many(entries: List[Tuple[str, Optional[str], dict]], ttl: int):
+    """_store_counts for several (key, version, counts) in one round-trip"""
+    entries = [entry for entry in entries if entry[1] is not None]
+    if not entries:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for key, version, counts in entries:
+            fields = [item for pair in counts.items() for item in pair]
+            pipe.eval(_SET_IF_UNCHANGED, 2, key, _version_key(key), version, ttl, *fields)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("stats set", e)
+
+
+def _bump(key: str, field: str, amount: int):
+    try:
+        get_redis().eval(
+            _INCR_IF_EXISTS, 2, key, _version_key(key), field, amount, settings.STATS_VERSION_TTL
+        )
+    except Exception as e:
+        log_cache_error("stats bump", e)
+
+
+def _reset(*keys: str):
+    try:
+        pipe = get_redis().pipeline()
+        for key in keys:
+            pipe.eval(_RESET, 2, key, _version_key(key), settings.STATS_VERSION_TTL)
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("stats reset", e)
+
+
+def _stats_key(user_id: int) -> str:
+    return f"stats:user:{user_id}"
+
+
+def _count_user_stats(db: Session, user_id: int) -> dict:
+    return {
+        "posts_count": db.query(func.count(Post.id))
+            .filter(Post.user_id == user_id, Post.status == "published").scalar(),
+        "favorites_count": db.query(func.count()).select_from(Favorite)
+            .filter(Favorite.user_id == user_id).scalar(),
+        "likes_received_count": db.query(func.count()).select_from(PostLike)
+            .join(Post, Post.id == PostLike.post_id)
+            .filter(Post.user_id == user_id).scalar(),
+        "comments_count": db.query(func.count(Comment.id))
+            .filter(Comment.user_id == user_id).scalar(),
+    }
+
+
+def get_user_stats(db: Session, user_id: int) -> dict:
+    """Profile counters, counted once and then kept up to date incrementally"""
+    key = _stats_key(user_id)
+    try:
+        cached = get_redis().hgetall(key)
+        if all(field in cached for field in STATS_FIELDS):
+            return {field: int(cached[field]) for field in STATS_FIELDS}
+    except Exception as e:
+        log_cache_error("stats get", e)
+
+    version = _read_version(key)
+    stats = _count_user_stats(db, user_id)
+    # The TTL is a safety net for drift, counters are otherwise maintained on writes
+    _store_counts(key, version, stats, settings.USER_STATS_TTL)
+    return stats
+
+
+def bump_user_stat(user_id: int, field: str, amount: int = 1):
+    """Adjust a cached profile counter"""
+    _bump(_stats_key(user_id), field, amount)
+
+
+def reset_user_stats(*user_ids: int):
+    """Drop cached profile counters so they are recounted on next read"""
+    if user_ids:
+        _reset(*[_stats_key(user_id) for user_id in user_ids])
+
+
+POST_COUNT_FIELDS = ("likes_count", "comments_count")
+
+
+def _post_counts_key(post_id: int) -> str:
+    return f"stats:post:{post_id}"
+
+
+def get_post_counts(db: Session, post_ids: List[int]) -> Dict[int, dict]:
+    """Like and comment counts per post, overlaid on cached post bodies.
+
+    Kept apart from the post cache so a like bumps a counter instead of
+    evicting the post. Misses are counted with one query per table.
+    """
+    counts = {}
+    versions = {}
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        for post_id in post_ids:
+            pipe.hgetall(_post_counts_key(post_id))
+            pipe.get(_version_key(_post_counts_key(post_id)))
+        replies = pipe.execute()
+        for post_id, cached, version in zip(post_ids, replies[::2], replies[1::2]):
+            if all(field in cached for field in POST_COUNT_FIELDS):
+                counts[post_id] = {field: int(cached[field]) for field in POST_COUNT_FIELDS}
+            else:
+                versions[post_id] = version or "0"
+    except Exception as e:
+        log_cache_error("stats get", e)
+
+    missing_ids = [post_id for post_id in post_ids if post_id not in counts]
+    if not missing_ids:
+        return counts
+    likes = dict(
+        db.query(PostLike.post_id, func.count())
+        .filter(PostLike.post_id.in_(missing_ids))
+        .group_by(PostLike.post_id)
+        .all()
+    )
+    comments = dict(
+        db.query(Comment.post_id, func.count())
+        .filter(Comment.post_id.in_(missing_ids))
+        .group_by(Comment.post_id)
+        .all()
+    )
+    for post_id in missing_ids:
+        counts[post_id] = {"likes_count": likes.get(post_id, 0), "comments_count": comments.get(post_id, 0)}
+    _store_many(
+        [(_post_counts_key(post_id), versions.get(post_id), counts[post_id]) for post_id in missing_ids],
+        settings.POST_COUNTS_TTL
+    )
+    return counts
+
+
+def bump_post_count(post_id: int, field: str, amount: int = 1):
+    """Adjust a cached post counter"""
+    _bump(_post_counts_key(post_id), field, amount)
+
+
+def reset_post_counts(*post_ids: int):
+    """Drop cached post counters so they are recounted on next read"""
+    if post_ids:
+        _reset(*[_post_counts_key(post_id) for post_id in post_ids])
+
+
+SITE_STATS_KEY = "stats:site"
+
+
+def get_published_posts_count() -> Optional[int]:
+    """Exact number of published posts, if cached"""
+    try:
+        cached = get_redis().hget(SITE_STATS_KEY, "published_posts")
+        return int(cached) if cached is not None else None
+    except Exception as e:
+        log_cache_error("stats get", e)
+        return None
+
+
+def ensure_published_posts_count(db: Session):
+    """Count published posts once; creates and deletes then bump the cached number.
+
+    Runs at startup and from the feed warmer, never on a request, so a
+    cache miss costs requests an estimate rather than a full count.
+    """
+    try:
+        if get_redis().hexists(SITE_STATS_KEY, "published_posts"):
+            return
+    except Exception as e:
+        log_cache_error("stats get", e)
+        return
+
+    version = _read_version(SITE_STATS_KEY)
+    count = db.query(func.count(Post.id)).filter(Post.status == "published").scalar()
+    _store_counts(SITE_STATS_KEY, version, {"published_posts": count}, settings.SITE_STATS_TTL)
+
+
+def bump_published_posts_count(amount: int = 1):
+    _bump(SITE_STATS_KEY, "published_posts", amount)
+
+
+def estimate_count(db: Session, query: Query) -> int:
+    """Row count the planner expects for query, without running it"""
+    compiled = query.statement.compile(dialect=db.get_bind().dialect)
+    plan = db.connection().exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    ).scalar()
+    return int(plan[0]["Plan"]["Plan Rows"])
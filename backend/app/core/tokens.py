@@ -0,0 +1,153 @@
+import hashlib
+import logging
+import secrets
+from typing import Optional, Tuple
+from sqlalchemy.orm import Session
+from app.config import settings
+from app.core.cache import delete_keys, get_redis, log_cache_error
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Refresh tokens are "<family>.<secret>". A family is one login session; each
+# refresh replaces its token, and only the SHA-256 of the current one is kept:
+#   refresh:family:<family>  hash {user_id, current}
+#   refresh:user:<user_id>   set of the user's families, for revocation
+
+
+class RefreshTokenError(Exception):
+    pass
+
+
+class RefreshTokenReused(RefreshTokenError):
+    """An already rotated token was presented; the whole family is revoked"""
+
+
+# Returns the user id on success, 0 when the presented token was already
+# rotated (the family is deleted), nil for an unknown or expired family.
+_ROTATE = """
+local current = redis.call('HGET', KEYS[1], 'current')
+if not current then
+    return nil
+end
+if current ~= ARGV[1] then
+    redis.call('DEL', KEYS[1])
+    return 0
+end
+redis.call('HSET', KEYS[1], 'current', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+return tonumber(redis.call('HGET', KEYS[1], 'user_id'))
+"""
+
+# Logout: deletes the family only if ARGV[1] is its current token hash, and
+# drops it (ARGV[2]) from the user's set in the same step
+_REVOKE = """
+local user_id = redis.call('HGET', KEYS[1], 'user_id')
+if not user_id or redis.call('HGET', KEYS[1], 'current') ~= ARGV[1] then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SREM', 'refresh:user:' .. user_id, ARGV[2])
+return 1
+"""
+
+
+def _family_key(family: str) -> str:
+    return f"refresh:family:{family}"
+
+
+def _user_families_key(user_id: int) -> str:
+    return f"refresh:user:{user_id}"
+
+
+def _session_user_key(user_id: int) -> str:
+    return f"auth:user:{user_id}"
+
+
+def _hash(token: str) -> str:
+    # Tokens are random, so a fast hash is enough (unlike passwords)
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _ttl() -> int:
+    return settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+
+
+def issue_refresh_token(user_id: int) -> str:
+    """Start a new session for a freshly authenticated user"""
+    family = secrets.token_urlsafe(16)
+    token = f"{family}.{secrets.token_urlsafe(32)}"
+    pipe = get_redis().pipeline()
+    pipe.hset(_family_key(family), mapping={
+        "user_id": user_id, "current": _hash(token)
+    })
+    pipe.expire(_family_key(family), _ttl())
+    pipe.sadd(_user_families_key(user_id), family)
+    pipe.expire(_user_families_key(user_id), _ttl())
+    pipe.execute()
+    return token
+
+
+def rotate_refresh_token(token: str) -> Tuple[int, str]:
+    """Swap a refresh token for a new one, returning (user_id, new_token).
+
+    Raises RefreshTokenReused when an old token comes back, which means it
+    leaked: the session is revoked for both the thief and the real user.
+    """
+    family, _, secret = token.partition(".")
+    if not family or not secret:
+        raise RefreshTokenError("Malformed refresh token")
+
+    new_token = f"{family}.{secrets.token_urlsafe(32)}"
+    user_id = get_redis().eval(
+        _ROTATE, 1, _family_key(family), _hash(token), _hash(new_token), _ttl()
+    )
+    if user_id is None:
+        raise RefreshTokenError("Unknown or expired refresh token")
+    if user_id == 0:
+        logger.warning("Refresh token reuse detected, session revoked", extra={"family": family})
+        raise RefreshTokenReused("Refresh token was already used")
+
+    return int(user_id), new_token
+
+
+def revoke_refresh_token(token: str):
+    """End the session a refresh token belongs to (logout)"""
+    family = token.partition(".")[0]
+    try:
+        get_redis().eval(_REVOKE, 1, _family_key(family), _hash(token), family)
+    except Exception as e:
+        log_cache_error("refresh revoke", e)
+
+
+def revoke_user_sessions(*user_ids: int):
+    """Revoke every refresh token of the users; call when deactivating them"""
+    pipe = get_redis().pipeline()
+    for user_id in user_ids:
+        for family in get_redis().smembers(_user_families_key(user_id)):
+            pipe.delete(_family_key(family))
+        pipe.delete(_user_families_key(user_id), _session_user_key(user_id))
+    pipe.execute()
+
+
+def session_username(db: Session, user_id: int) -> Optional[str]:
+    """Current username of an active user, None if inactive or gone; cached briefly"""
+    try:
+        cached = get_redis().get(_session_user_key(user_id))
+        if cached is not None:
+            return cached or None
+    except Exception as e:
+        log_cache_error("session user", e)
+
+    user = db.query(User.username, User.is_active).filter(User.id == user_id).first()
+    username = user.username if user and user.is_active else None
+    try:
+        get_redis().setex(_session_user_key(user_id), settings.USER_ACTIVE_CACHE_TTL, username or "")
+    except Exception as e:
+        log_cache_error("session user", e)
+    return username
+
+
+def forget_session_user(user_id: int):
+    """Drop the cached username after a rename, so the next access token has the new one"""
+    delete_keys(_session_user_key(user_id))
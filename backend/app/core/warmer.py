@@ -0,0 +1,127 @@
+import json
+import time
+import uuid
+from typing import Callable, List, Optional, Tuple
+from app.config import settings
+from app.core.cache import get_redis, log_cache_error
+from app.core.stats import ensure_published_posts_count
+from app.database import SessionLocal
+
+# Kept outside the "posts:*" namespace so cache invalidation doesn't wipe them
+POPULARITY_KEY = "stats:feed_popularity"
+PENDING_KEY = "stats:feed_warm_pending"
+LOCK_KEY = "lock:feed_warm"
+
+# Front page is always warmed, even before any traffic was recorded
+DEFAULT_PAGES = [(None, 0, 20)]
+
+
+# Compare-and-delete, so a holder whose lock expired can't drop a new one
+_RELEASE = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+def record_feed_hit(search: Optional[str], skip: int, limit: int):
+    """Count a feed/search page request.
+
+    The set is also trimmed here, not only when warming, so a site without
+    new posts (and so without warm passes) can't grow it without bound.
+    Trimming to twice the tracked size leaves new pages room to climb.
+    """
+    if search and len(search) > settings.CACHE_WARM_MAX_SEARCH:
+        return
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.zincrby(POPULARITY_KEY, 1, json.dumps([search, skip, limit]))
+        pipe.zremrangebyrank(POPULARITY_KEY, 0, -(2 * settings.CACHE_WARM_TRACKED + 1))
+        pipe.execute()
+    except Exception as e:
+        log_cache_error("warmer hit", e)
+
+
+def popular_feed_pages(count: int) -> List[Tuple[Optional[str], int, int]]:
+    """Most requested feed pages, most popular first"""
+    pages = list(DEFAULT_PAGES)
+    try:
+        members = get_redis().zrevrange(POPULARITY_KEY, 0, count - 1)
+    except Exception as e:
+        log_cache_error("warmer popularity", e)
+        return pages
+
+    for member in members:
+        page = tuple(json.loads(member))
+        if page not in pages:
+            pages.append(page)
+    return pages[:count]
+
+
+def request_feed_warm():
+    """Mark the feed cache as needing a rebuild"""
+    try:
+        get_redis().set(PENDING_KEY, 1)
+    except Exception as e:
+        log_cache_error("warmer request", e)
+
+
+def _decay_popularity():
+    """Halve scores and drop the long tail so recent traffic wins"""
+    pipe = get_redis().pipeline()
+    pipe.zunionstore(POPULARITY_KEY, {POPULARITY_KEY: 0.5})
+    pipe.zremrangebyrank(POPULARITY_KEY, 0, -(settings.CACHE_WARM_TRACKED + 1))
+    pipe.execute()
+
+
+def warm_feed_cache(warm_page: Callable):
+    """Rebuild the most requested feed pages.
+
+    Only one worker warms at a time (Redis lock). Invalidations that happen
+    while warming re-arm the pending flag, so the holder runs another pass.
+    A request that lands after the holder's last check but before it lets
+    go finds the lock taken, so the holder checks once more after releasing.
+    Pages are rebuilt one by one with a pause in between to spare Postgres.
+    """
+    while _warm_while_pending(warm_page):
+        try:
+            if not get_redis().exists(PENDING_KEY):
+                return
+        except Exception as e:
+            log_cache_error("warmer", e)
+            return
+
+
+def _release(token: str):
+    try:
+        get_redis().eval(_RELEASE, 1, LOCK_KEY, token)
+    except Exception as e:
+        log_cache_error("warmer unlock", e)
+
+
+def _warm_while_pending(warm_page: Callable) -> bool:
+    """One locked warming run; False if another worker holds the lock"""
+    token = uuid.uuid4().hex
+    try:
+        if not get_redis().set(LOCK_KEY, token, nx=True, ex=settings.CACHE_WARM_LOCK_TTL):
+            return False
+    except Exception as e:
+        log_cache_error("warmer lock", e)
+        return False
+
+    db = SessionLocal()
+    try:
+        ensure_published_posts_count(db)
+        while get_redis().getdel(PENDING_KEY):
+            for search, skip, limit in popular_feed_pages(settings.CACHE_WARM_TOP_N):
+                warm_page(db, search, skip, limit)
+                get_redis().expire(LOCK_KEY, settings.CACHE_WARM_LOCK_TTL)
+                time.sleep(settings.CACHE_WARM_DELAY)
+            _decay_popularity()
+    except Exception as e:
+        log_cache_error("warmer", e)
+    finally:
+        db.close()
+        _release(token)
+    return True
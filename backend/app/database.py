@@ -1,18 +1,49 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+Base = declarative_base()
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Created on first use, so importing models (tests, CLI tools, Alembic)
+# never builds a pool or touches the database
+_engine: Optional[Engine] = None
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
 
-Base = declarative_base()
+
+def get_engine() -> Engine:
+    global _engine
+    if _engine is None:
+        _engine = create_engine(
+            settings.DATABASE_URL,
+            pool_pre_ping=True,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW
+        )
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """New session bound to the lazily created engine"""
+    return _session_factory(bind=get_engine())
+
+
+def warm_db_pool():
+    """Open pool_size connections up front so first requests don't pay for connecting"""
+    engine = get_engine()
+    connections = [engine.connect() for _ in range(settings.DB_POOL_SIZE)]
+    for connection in connections:
+        connection.exec_driver_sql("SELECT 1")
+        connection.close()
+
+
+def dispose_engine():
+    global _engine
+    if _engine is not None:
+        _engine.dispose()
+        _engine = None
 
 
 def get_db():
@@ -20,4 +51,4 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
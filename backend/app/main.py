@@ -1,48 +1,230 @@
-from fastapi import FastAPI
+import logging
+import random
+import threading
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Request, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from .config import settings
-from .api import auth, users, posts
+from .database import SessionLocal, warm_db_pool, dispose_engine
+from .core.cache import warm_redis_pool, close_redis, breaker_metrics, log_cache_error, redis_available
+from .core.autocomplete import ensure_autocomplete
+from .core.events import post_event_broker
+from .core.profiling import RequestProfile, current_profile, instrument as instrument_profiling, record_profile
+from .core.security import decode_access_token
+from .core.images import shutdown_image_pool
+from .core.stats import ensure_published_posts_count
+from .core.warmer import request_feed_warm, warm_feed_cache
 
-app = FastAPI(
-    title=settings.APP_NAME,
-    version=settings.APP_VERSION,
-    docs_url="/api/docs",
-    redoc_url="/api/redoc"
-)
+logger = logging.getLogger(__name__)
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=settings.BACKEND_CORS_ORIGINS,
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
 
-# Gzip compression
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+class StreamingAwareGZipMiddleware(GZipMiddleware):
+    """GZip that leaves Server-Sent Event streams alone, since it would buffer them"""
 
-# Include routers
-app.include_router(auth.router, prefix="/api")
-app.include_router(users.router, prefix="/api")
-app.include_router(posts.router, prefix="/api")
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
 
 
-@app.get("/")
-def root():
-    return {
-        "name": settings.APP_NAME,
-        "version": settings.APP_VERSION,
-        "docs": "/api/docs"
-    }
+def _is_admin_token(authorization: str) -> bool:
+    from .models.user import User
 
+    scheme, _, token = authorization.partition(" ")
+    payload = decode_access_token(token) if scheme.lower() == "bearer" else None
+    if not payload or payload.get("sub") is None:
+        return False
+    db = SessionLocal()
+    try:
+        return bool(db.query(User.is_admin).filter(
+            User.id == payload["sub"], User.is_active == True  # noqa: E712
+        ).scalar())
+    finally:
+        db.close()
 
-@app.get("/health")
-def health_check():
-    return {"status": "healthy"}
+
+class ProfilingMiddleware:
+    """Profile requests asked for by an admin (X-Profile: 1) or sampled at random"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def _reason(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        if headers.get(b"x-profile") == b"1":
+            authorization = headers.get(b"authorization", b"").decode("latin-1")
+            if await run_in_threadpool(_is_admin_token, authorization):
+                return "header"
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        reason = await self._reason(scope)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+        status_code = 500
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        token = current_profile.set(profile)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            current_profile.reset(token)
+            summary = profile.summary(time.perf_counter() - started, status_code)
+            await run_in_threadpool(record_profile, summary)
+
+
+def _warm_up():
+    """Open DB and Redis pools, prime the post count and run the hot queries once"""
+    from .api.posts import encode_posts_page
+
+    warm_db_pool()
+    try:
+        warm_redis_pool()
+    except Exception as e:
+        # Every Redis path falls back to the database, so this only degrades
+        log_cache_error("warm-up", e)
+    db = SessionLocal()
+    try:
+        ensure_published_posts_count(db)
+        if settings.PRECOMPILE_QUERIES:
+            encode_posts_page(db, None, 0, settings.DEFAULT_PAGE_SIZE)
+    finally:
+        db.close()
+
+
+def _mark_ready(app: FastAPI):
+    from .api.posts import warm_posts_page
+
+    app.state.ready = True
+    # Fill the other popular feed pages and the autocomplete index in the background
+    request_feed_warm()
+    threading.Thread(target=warm_feed_cache, args=(warm_posts_page,), daemon=True).start()
+    ensure_autocomplete()
+
+
+def _retry_warm_up(app: FastAPI):
+    while not app.state.ready and not app.state.shutting_down:
+        time.sleep(2)
+        try:
+            _warm_up()
+        except Exception as e:
+            logger.warning("Warm-up retry failed: %s", e)
+            continue
+        _mark_ready(app)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    app.state.shutting_down = False
+    try:
+        await run_in_threadpool(_warm_up)
+        _mark_ready(app)
+    except Exception as e:
+        # Keep serving (DB-only paths may still work) but stay out of rotation
+        logger.warning("Warm-up failed: %s", e)
+        threading.Thread(target=_retry_warm_up, args=(app,), daemon=True).start()
+
+    yield
+
+    app.state.ready = False
+    app.state.shutting_down = True
+    await post_event_broker.close()
+    dispose_engine()
+    close_redis()
+    shutdown_image_pool()
+
+
+def create_app() -> FastAPI:
+    # Routers are imported here so importing app.main stays cheap
+    from .api import auth, users, posts, media, admin
+
+    app = FastAPI(
+        title=settings.APP_NAME,
+        version=settings.APP_VERSION,
+        docs_url="/api/docs",
+        redoc_url="/api/redoc",
+        lifespan=lifespan
+    )
+    app.state.ready = False
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.BACKEND_CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Opt-in profiling; when disabled nothing is installed at all
+    if settings.PROFILING_ENABLED:
+        app.add_middleware(ProfilingMiddleware)
+
+    # Gzip compression (cached feed pages arrive already encoded and pass through)
+    app.add_middleware(StreamingAwareGZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
+    # Include routers
+    app.include_router(auth.router, prefix="/api")
+    app.include_router(users.router, prefix="/api")
+    app.include_router(posts.router, prefix="/api")
+    app.include_router(media.router, prefix="/api")
+    app.include_router(admin.router, prefix="/api")
+    if settings.PROFILING_ENABLED:
+        instrument_profiling(app)
+
+    @app.get("/")
+    def root():
+        return {
+            "name": settings.APP_NAME,
+            "version": settings.APP_VERSION,
+            "docs": "/api/docs"
+        }
+
+    @app.get("/health")
+    def health_check():
+        return {"status": "healthy"}
+
+    @app.get("/ready")
+    def readiness_check(request: Request):
+        # Unlike /health, only green once pools are warm. Redis being down
+        # (or the breaker open) is reported but keeps the instance in
+        # rotation, since requests fall back to the database
+        if not request.app.state.ready:
+            return JSONResponse(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                content={"status": "warming up"}
+            )
+        return {"status": "ready", "redis": "ok" if redis_available() else "degraded"}
+
+    @app.get("/metrics", response_class=PlainTextResponse)
+    def metrics():
+        # Prometheus text format; breaker state is 0 closed, 1 half-open, 2 open
+        return "".join(f"{name} {value}\n" for name, value in breaker_metrics().items())
+
+    return app
 
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    uvicorn.run(create_app(), host="0.0.0.0", port=8000)
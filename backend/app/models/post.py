@@ -30,7 +30,15 @@ class Post(Base):
     __table_args__ = (
         Index('idx_posts_search', 'search_vector', postgresql_using='gin'),
         Index('idx_posts_user_id', 'user_id'),
-        Index('idx_posts_status', 'status'),
+        Index('idx_posts_status_created_at', 'status', 'created_at'),
+        Index(
+            'idx_posts_title_trgm', 'title',
+            postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}
+        ),
+        Index(
+            'idx_posts_content_trgm', 'content',
+            postgresql_using='gin', postgresql_ops={'content': 'gin_trgm_ops'}
+        ),
     )
 
 
@@ -51,6 +59,16 @@ class Comment(Base):
     author = relationship("User", back_populates="comments")
     replies = relationship("Comment", backref="parent", remote_side=[id])
 
+    # Indexes
+    __table_args__ = (
+        Index('idx_comments_post_id_created_at', 'post_id', 'created_at'),
+        Index('idx_comments_user_id', 'user_id'),
+        Index(
+            'idx_comments_parent_comment_id', 'parent_comment_id',
+            postgresql_where=parent_comment_id.isnot(None)
+        ),
+    )
+
 
 class Favorite(Base):
     __tablename__ = "favorites"
@@ -63,6 +81,11 @@ class Favorite(Base):
     user = relationship("User", back_populates="favorites")
     post = relationship("Post", back_populates="favorites")
 
+    # Indexes
+    __table_args__ = (
+        Index('idx_favorites_post_id', 'post_id'),
+    )
+
 
 class PostLike(Base):
     __tablename__ = "post_likes"
@@ -74,3 +97,8 @@ class PostLike(Base):
     # Relationships
     user = relationship("User", back_populates="post_likes")
     post = relationship("Post", back_populates="likes")
+
+    # Indexes
+    __table_args__ = (
+        Index('idx_post_likes_post_id', 'post_id'),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text
+from sqlalchemy import Boolean, Column, Integer, String, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -22,4 +22,13 @@ class User(Base):
     posts = relationship("Post", back_populates="author", cascade="all, delete-orphan")
     comments = relationship("Comment", back_populates="author", cascade="all, delete-orphan")
     favorites = relationship("Favorite", back_populates="user", cascade="all, delete-orphan")
-    post_likes = relationship("PostLike", back_populates="user", cascade="all, delete-orphan")
\ No newline at end of file
+    post_likes = relationship("PostLike", back_populates="user", cascade="all, delete-orphan")
+
+    # Indexes
+    __table_args__ = (
+        # Trigram index for similarity search on usernames (pg_trgm)
+        Index(
+            'idx_users_username_trgm', 'username',
+            postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}
+        ),
+    )
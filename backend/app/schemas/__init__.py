@@ -1,10 +1,14 @@
-from .user import UserCreate, UserUpdate, UserResponse, UserProfile
-from .post import PostCreate, PostUpdate, PostResponse, PostList, CommentCreate, CommentResponse
-from .auth import Token, TokenData, LoginRequest
+from .user import UserCreate, UserUpdate, UserResponse, UserProfile, UserBatch, UserSuggestion
+from .post import PostCreate, PostUpdate, PostResponse, PostList, PostBatch, CommentCreate, CommentResponse
+from .auth import Token, TokenData, LoginRequest, RefreshRequest
+from .media import ImageUpload
+from .admin import ProfiledFunction, RequestProfile, UserModeration, PostPurge, Job
 
 __all__ = [
-    'UserCreate', 'UserUpdate', 'UserResponse', 'UserProfile',
-    'PostCreate', 'PostUpdate', 'PostResponse', 'PostList',
+    'UserCreate', 'UserUpdate', 'UserResponse', 'UserProfile', 'UserBatch', 'UserSuggestion',
+    'PostCreate', 'PostUpdate', 'PostResponse', 'PostList', 'PostBatch',
     'CommentCreate', 'CommentResponse',
-    'Token', 'TokenData', 'LoginRequest'
+    'Token', 'TokenData', 'LoginRequest', 'RefreshRequest',
+    'ImageUpload',
+    'ProfiledFunction', 'RequestProfile', 'UserModeration', 'PostPurge', 'Job'
 ]
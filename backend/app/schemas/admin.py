@@ -0,0 +1,54 @@
+from pydantic import BaseModel, Field, model_validator
+from typing import Dict, List, Optional
+from datetime import datetime
+
+
+class ProfiledFunction(BaseModel):
+    function: str
+    calls: int
+    own_ms: float
+    cumulative_ms: float
+
+
+class RequestProfile(BaseModel):
+    method: str
+    path: str
+    status_code: int
+    reason: str
+    # host:pid of the worker that served the request
+    worker: str
+    started_at: datetime
+    total_ms: float
+    sql_ms: float
+    sql_count: int
+    python_ms: float
+    functions: List[ProfiledFunction]
+
+
+class UserModeration(BaseModel):
+    user_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    deactivate: bool = True
+    purge_content: bool = False
+
+    @model_validator(mode="after")
+    def has_action(self):
+        if not (self.deactivate or self.purge_content):
+            raise ValueError("Nothing to do: set deactivate and/or purge_content")
+        return self
+
+
+class PostPurge(BaseModel):
+    post_ids: List[int] = Field(..., min_length=1, max_length=1000)
+
+
+class Job(BaseModel):
+    id: str
+    kind: str
+    status: str
+    params: dict
+    step: Optional[str] = None
+    steps: List[str]
+    deleted: Dict[str, int]
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
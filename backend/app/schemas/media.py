@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+from typing import Dict
+
+
+class ImageUpload(BaseModel):
+    url: str
+    sizes: Dict[str, Dict[str, str]]
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from pydantic import BaseModel, Field, computed_field
+from typing import Dict, Optional, List
 from datetime import datetime
+from ..core.images import image_sizes
 
 
 class PostBase(BaseModel):
@@ -51,6 +52,12 @@ class PostResponse(PostBase):
     is_liked: bool = False
     is_favorited: bool = False
 
+    @computed_field
+    @property
+    def featured_image_sizes(self) -> Optional[Dict[str, Dict[str, str]]]:
+        # Thumbnail URLs for uploaded images, so list views skip the original
+        return image_sizes(self.featured_image)
+
     class Config:
         from_attributes = True
 
@@ -58,6 +65,13 @@ class PostResponse(PostBase):
 class PostList(BaseModel):
     items: List[PostResponse]
     total: int
+    # False when total is a planner estimate (filtered searches)
+    exact: bool = True
     page: int
     page_size: int
-    pages: int
\ No newline at end of file
+    pages: int
+
+
+class PostBatch(BaseModel):
+    items: List[PostResponse]
+    missing: List[int]
\ No newline at end of file
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr, Field, field_validator
-from typing import Optional
+from pydantic import BaseModel, EmailStr, Field, computed_field, field_validator
+from typing import Dict, List, Optional
 from datetime import datetime
+from ..core.images import image_sizes
 
 
 class UserBase(BaseModel):
@@ -34,10 +35,27 @@ class UserResponse(UserBase):
     is_admin: bool
     created_at: datetime
 
+    @computed_field
+    @property
+    def avatar_sizes(self) -> Optional[Dict[str, Dict[str, str]]]:
+        return image_sizes(self.avatar_url)
+
     class Config:
         from_attributes = True
 
 
 class UserProfile(UserResponse):
     posts_count: int = 0
-    favorites_count: int = 0
\ No newline at end of file
+    favorites_count: int = 0
+    likes_received_count: int = 0
+    comments_count: int = 0
+
+
+class UserBatch(BaseModel):
+    items: List[UserResponse]
+    missing: List[int]
+
+
+class UserSuggestion(BaseModel):
+    id: int
+    username: str
\ No newline at end of file
@@ -0,0 +1,184 @@
+"""Fixtures for the query-plan suite.
+
+The suite needs a disposable Postgres database given by TEST_DATABASE_URL;
+it is wiped, migrated and seeded. Redis (TEST_REDIS_URL, default db 15 on
+localhost) is flushed before every request so endpoints always hit SQL.
+Without TEST_DATABASE_URL every test is skipped.
+
+Unit tests use the fake_redis fixture instead: an in-memory fakeredis
+server put behind app.core.cache, so they run anywhere.
+"""
+import os
+from contextlib import contextmanager
+
+import pytest
+
+TEST_DATABASE_URL = os.environ.get("TEST_DATABASE_URL")
+TEST_REDIS_URL = os.environ.get("TEST_REDIS_URL", "redis://localhost:6379/15")
+
+# Must happen before app.config is imported anywhere
+if TEST_DATABASE_URL:
+    os.environ["DATABASE_URL"] = TEST_DATABASE_URL
+    os.environ["REDIS_URL"] = TEST_REDIS_URL
+
+# Realistic enough that the planner prefers indexes whenever one applies
+SEED_SIZES = {
+    "users": 5000,
+    "posts": 50000,
+    "comments": 100000,
+    "likes": 200000,
+    "favorites": 50000,
+}
+
+SEED_SQL = [
+    """
+    INSERT INTO users (email, username, password_hash, bio, is_active, is_admin, created_at)
+    SELECT 'user' || i || '@example.com', 'user_' || i, 'x', 'Bio of user ' || i,
+           true, i = 1, now() - i * interval '1 hour'
+    FROM generate_series(1, %(users)s) AS i
+    """,
+    """
+    INSERT INTO posts (user_id, title, content, excerpt, status, created_at)
+    SELECT 1 + i %% %(users)s, 'Post number ' || i, repeat('Lorem ipsum dolor sit amet. ', 20) || i,
+           'Excerpt ' || i, CASE WHEN i %% 10 = 0 THEN 'draft' ELSE 'published' END,
+           now() - i * interval '1 minute'
+    FROM generate_series(1, %(posts)s) AS i
+    """,
+    """
+    INSERT INTO comments (post_id, user_id, content, is_approved, created_at)
+    SELECT 1 + (i * 7) %% %(posts)s, 1 + (i * 13) %% %(users)s, 'Comment ' || i, true,
+           now() - i * interval '1 second'
+    FROM generate_series(1, %(comments)s) AS i
+    """,
+    """
+    INSERT INTO post_likes (user_id, post_id)
+    SELECT 1 + i %% %(users)s, 1 + (i * 31) %% %(posts)s
+    FROM generate_series(1, %(likes)s) AS i
+    ON CONFLICT DO NOTHING
+    """,
+    """
+    INSERT INTO favorites (user_id, post_id)
+    SELECT 1 + i %% %(users)s, 1 + (i * 17) %% %(posts)s
+    FROM generate_series(1, %(favorites)s) AS i
+    ON CONFLICT DO NOTHING
+    """,
+]
+
+
+def _reset_schema(engine):
+    from alembic import command
+    from alembic.config import Config
+
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP SCHEMA public CASCADE")
+        conn.exec_driver_sql("CREATE SCHEMA public")
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
+    config = Config(os.path.join(backend_dir, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(backend_dir, "alembic"))
+    config.set_main_option("sqlalchemy.url", TEST_DATABASE_URL)
+    command.upgrade(config, "head")
+
+
+@pytest.fixture(scope="session")
+def seeded_engine():
+    if not TEST_DATABASE_URL:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    from sqlalchemy.exc import OperationalError
+    from app.database import get_engine
+
+    engine = get_engine()
+    try:
+        with engine.connect():
+            pass
+    except OperationalError as e:
+        pytest.skip(f"Test database unavailable: {e}")
+
+    _reset_schema(engine)
+    with engine.begin() as conn:
+        for statement in SEED_SQL:
+            conn.exec_driver_sql(statement, SEED_SIZES)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.exec_driver_sql("ANALYZE")
+    return engine
+
+
+@pytest.fixture(scope="session")
+def client(seeded_engine):
+    from fastapi.testclient import TestClient
+    from app.main import create_app
+
+    # No context manager: the lifespan (pool and cache warming) stays out of the way
+    return TestClient(create_app())
+
+
+@pytest.fixture(scope="session")
+def auth_headers(seeded_engine):
+    from app.core.security import create_access_token
+
+    return {"Authorization": f"Bearer {create_access_token({'sub': 1, 'username': 'user_1'})}"}
+
+
+@pytest.fixture
+def flush_cache():
+    import redis
+
+    def flush():
+        try:
+            redis.from_url(TEST_REDIS_URL).flushdb()
+        except redis.RedisError:
+            pass  # no Redis: the cache layer already falls through to SQL
+
+    return flush
+
+
+@pytest.fixture
+def capture_sql(seeded_engine):
+    """Collect every (statement, parameters) the app sends to Postgres"""
+    from sqlalchemy import event
+
+    @contextmanager
+    def capture():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append((statement, parameters))
+
+        event.listen(seeded_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(seeded_engine, "before_cursor_execute", record)
+
+    return capture
+
+
+@pytest.fixture
+def explain(seeded_engine):
+    """EXPLAIN a captured statement and return the root plan node"""
+
+    def run(statement, parameters):
+        with seeded_engine.connect() as conn:
+            row = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters).scalar()
+        return row[0]["Plan"]
+
+    return run
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    """In-memory Redis behind get_redis(), with a fresh circuit breaker"""
+    import fakeredis
+    from app.config import settings
+    from app.core import cache
+
+    server = fakeredis.FakeServer()
+    client = fakeredis.FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(cache, "_redis_client", client)
+    monkeypatch.setattr(cache, "_redis_bytes_client", fakeredis.FakeRedis(server=server))
+    monkeypatch.setattr(
+        cache, "breaker",
+        cache.CircuitBreaker(settings.REDIS_BREAKER_THRESHOLD, settings.REDIS_BREAKER_COOLDOWN)
+    )
+    return client
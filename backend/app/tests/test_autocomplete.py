@@ -0,0 +1,92 @@
+"""Username autocomplete index: rebuilds, live updates and prefix ranges."""
+from app.core import autocomplete
+from app.core.autocomplete import AUTOCOMPLETE_KEY, LOCK_KEY
+
+
+class FakeUsers:
+    """Stands in for the Session; yields (id, username) rows, then runs during()"""
+
+    def __init__(self, rows, during=None):
+        self.rows = rows
+        self.during = during
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def yield_per(self, count):
+        for row in self.rows:
+            yield row
+        if self.during:
+            self.during()
+
+
+def _names(suggestions):
+    return [suggestion["username"] for suggestion in suggestions]
+
+
+def test_rebuild_swaps_in_a_persistent_index_and_cleans_up(fake_redis):
+    assert autocomplete.rebuild_autocomplete(FakeUsers([(1, "alice"), (2, "Bob")]))
+    assert fake_redis.zcard(AUTOCOMPLETE_KEY) == 2
+    assert fake_redis.ttl(AUTOCOMPLETE_KEY) == -1
+    assert fake_redis.keys(f"{AUTOCOMPLETE_KEY}:rebuild:*") == []
+    assert not fake_redis.exists(LOCK_KEY)
+
+
+def test_only_one_rebuild_at_a_time(fake_redis):
+    fake_redis.set(LOCK_KEY, "someone else")
+    assert not autocomplete.rebuild_autocomplete(FakeUsers([(1, "alice")]))
+    assert not fake_redis.exists(AUTOCOMPLETE_KEY)
+    assert fake_redis.get(LOCK_KEY) == "someone else"
+
+
+def test_users_added_during_a_rebuild_are_kept(fake_redis):
+    def register():
+        autocomplete.add_username(3, "carol")
+
+    autocomplete.rebuild_autocomplete(FakeUsers([(1, "alice"), (2, "bob")], during=register))
+    assert _names(autocomplete.suggest_usernames(None, "", 10)) == ["alice", "bob", "carol"]
+
+    autocomplete.remove_username(1, "alice")
+    assert _names(autocomplete.suggest_usernames(None, "", 10)) == ["bob", "carol"]
+
+
+def test_add_without_an_index_creates_nothing(fake_redis):
+    autocomplete.add_username(1, "alice")
+    assert fake_redis.keys("*") == []
+
+
+def test_prefix_range_covers_non_latin1_usernames(fake_redis):
+    autocomplete.rebuild_autocomplete(FakeUsers([(1, "aш"), (2, "Ab"), (3, "b"), (4, "ölaf")]))
+    assert _names(autocomplete.suggest_usernames(None, "A", 10)) == ["Ab", "aш"]
+    assert _names(autocomplete.suggest_usernames(None, "Ö", 10)) == ["ölaf"]
+    assert _names(autocomplete.suggest_usernames(None, "a", 1)) == ["Ab"]
+
+
+def test_missing_index_is_rebuilt_off_the_request(fake_redis, monkeypatch):
+    started = []
+    monkeypatch.setattr(autocomplete, "_rebuild_in_background", lambda: started.append(True))
+    monkeypatch.setattr(
+        autocomplete, "_suggest_from_db", lambda db, prefix, limit: [{"id": 1, "username": "alice"}]
+    )
+    assert _names(autocomplete.suggest_usernames(None, "al", 10)) == ["alice"]
+    assert started == [True]
+
+
+def test_database_fallback_treats_wildcards_literally(seeded_engine):
+    # Needs TEST_DATABASE_URL, like the query-plan suite
+    from app.database import SessionLocal
+    from app.models.user import User
+
+    db = SessionLocal()
+    try:
+        for name in ("wild_a_b", "wild_axb", "wild%x"):
+            db.add(User(email=f"{name}@example.com", username=name, password_hash="x"))
+        db.flush()
+        assert _names(autocomplete._suggest_from_db(db, "wild_a_", 10)) == ["wild_a_b"]
+        assert _names(autocomplete._suggest_from_db(db, "wild%", 10)) == ["wild%x"]
+    finally:
+        db.rollback()
+        db.close()
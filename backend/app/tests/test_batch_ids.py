@@ -0,0 +1,29 @@
+"""Parsing of the ?ids= list shared by the batch endpoints."""
+import pytest
+from fastapi import HTTPException
+
+from app.api.deps import get_batch_ids
+from app.config import settings
+
+
+def test_keeps_request_order_and_drops_duplicates():
+    assert get_batch_ids("3,1,3,2,1") == [3, 1, 2]
+
+
+def test_ignores_empty_parts_and_whitespace():
+    assert get_batch_ids(" 4, ,5,") == [4, 5]
+
+
+@pytest.mark.parametrize("ids", ["1,two", "1.5", ""])
+def test_rejects_bad_or_empty_lists(ids):
+    with pytest.raises(HTTPException) as error:
+        get_batch_ids(ids)
+    assert error.value.status_code == 400
+
+
+def test_rejects_more_than_max_batch_size():
+    ids = ",".join(str(i) for i in range(settings.MAX_BATCH_SIZE + 1))
+    with pytest.raises(HTTPException) as error:
+        get_batch_ids(ids)
+    assert str(settings.MAX_BATCH_SIZE) in error.value.detail
+    assert len(get_batch_ids(",".join(str(i) for i in range(settings.MAX_BATCH_SIZE)))) == settings.MAX_BATCH_SIZE
@@ -0,0 +1,82 @@
+"""Redis circuit breaker: opening, the half-open trial and closing again."""
+import pytest
+import redis
+
+from app.core import cache
+from app.core.cache import CircuitBreaker, CircuitOpenError, _guarded
+
+
+def _refused():
+    raise redis.ConnectionError("refused")
+
+
+def _wrong_type():
+    raise redis.ResponseError("WRONGTYPE")
+
+
+def _cool_down(breaker):
+    breaker.opened_at -= breaker.cooldown
+
+
+@pytest.fixture
+def breaker(fake_redis):
+    cache.breaker.threshold = 2
+    return cache.breaker
+
+
+def _fail(times):
+    for _ in range(times):
+        with pytest.raises(redis.ConnectionError):
+            _guarded(_refused)
+
+
+def test_closed_open_half_open_closed(breaker, fake_redis):
+    _fail(2)
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        _guarded(fake_redis.ping)
+    assert breaker.short_circuited_total == 1
+
+    _cool_down(breaker)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert _guarded(fake_redis.ping)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.opens_total == 1
+
+
+def test_failed_trial_reopens(breaker):
+    _fail(2)
+    _cool_down(breaker)
+    _fail(1)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.opens_total == 1
+
+
+def test_error_reply_on_trial_closes(breaker, fake_redis):
+    _fail(2)
+    _cool_down(breaker)
+    with pytest.raises(redis.ResponseError):
+        _guarded(_wrong_type)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert not breaker.trial_in_flight
+
+
+def test_trial_without_an_outcome_frees_the_slot(breaker, fake_redis):
+    def cancelled():
+        raise KeyboardInterrupt
+
+    _fail(2)
+    _cool_down(breaker)
+    with pytest.raises(KeyboardInterrupt):
+        _guarded(cancelled)
+    assert not breaker.trial_in_flight
+    assert _guarded(fake_redis.ping)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_error_replies_reset_the_failure_count(breaker):
+    _fail(1)
+    with pytest.raises(redis.ResponseError):
+        _guarded(_wrong_type)
+    _fail(1)
+    assert breaker.state == CircuitBreaker.CLOSED
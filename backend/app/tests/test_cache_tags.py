@@ -0,0 +1,38 @@
+"""Tag sets: keys recorded under tags and dropped together on invalidation."""
+from app.core.cache import get_cache, invalidate_tags, set_cache, set_many_cache
+
+
+def test_invalidating_a_tag_deletes_its_keys_only(fake_redis):
+    set_many_cache(
+        {"page:1": {"n": 1}, "page:2": {"n": 2}, "page:3": {"n": 3}},
+        ttl=60,
+        tags={"page:1": ["feed", "post:7"], "page:2": ["feed"], "page:3": ["user:9"]},
+    )
+    invalidate_tags("post:7")
+    assert get_cache("page:1") is None
+    assert get_cache("page:2") == {"n": 2}
+    assert not fake_redis.exists("tag:post:7")
+    # The key's other tag set may keep a stale member; deleting it again is harmless
+    invalidate_tags("feed", "user:9")
+    assert fake_redis.keys("*") == []
+
+
+def test_tag_set_outlives_its_longest_member(fake_redis):
+    set_many_cache({"short": {}}, ttl=10, tags={"short": ["feed"]})
+    set_many_cache({"long": {}}, ttl=100, tags={"long": ["feed"]})
+    set_many_cache({"shorter": {}}, ttl=5, tags={"shorter": ["feed"]})
+    assert 90 < fake_redis.ttl("tag:feed") <= 100
+
+
+def test_untagged_keys_survive(fake_redis):
+    set_cache("plain", {"n": 1}, ttl=60)
+    set_many_cache({"tagged": {}}, ttl=60, tags={"tagged": ["feed"]})
+    invalidate_tags("feed", "never-used")
+    assert get_cache("plain") == {"n": 1}
+
+
+def test_large_tag_sets_are_deleted_in_chunks(fake_redis):
+    keys = {f"page:{i}": {} for i in range(2500)}
+    set_many_cache(keys, ttl=60, tags={key: ["feed"] for key in keys})
+    invalidate_tags("feed")
+    assert fake_redis.dbsize() == 0
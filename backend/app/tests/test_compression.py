@@ -0,0 +1,49 @@
+"""Accept-Encoding negotiation and the pre-compressed variants of feed pages."""
+import gzip
+
+import pytest
+
+from app.config import settings
+from app.core import compression
+from app.core.compression import accepted_encodings, compress_variants
+
+
+@pytest.fixture
+def all_compressors(monkeypatch):
+    # brotli and zstandard are optional; stand-ins keep these tests independent of them
+    compressors = dict(compression.COMPRESSORS, br=lambda body: b"br:" + body, zstd=lambda body: b"zstd:" + body)
+    monkeypatch.setattr(compression, "COMPRESSORS", compressors)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate, br, zstd", ["br", "zstd", "gzip", "identity"]),
+    ("gzip;q=1.0, br;q=0.5", ["gzip", "br", "identity"]),
+    ("GZIP , Br", ["br", "gzip", "identity"]),
+    ("br;q=0, gzip", ["gzip", "identity"]),
+    ("*;q=0.5, gzip", ["gzip", "br", "zstd", "identity"]),
+    ("gzip;q=bogus, br", ["br", "identity"]),
+    ("deflate, compress", ["identity"]),
+    ("", ["identity"]),
+])
+def test_accepted_encodings(all_compressors, header, expected):
+    assert accepted_encodings(header) == expected
+
+
+def test_only_available_encodings_are_offered(monkeypatch):
+    monkeypatch.setattr(compression, "COMPRESSORS", {"gzip": compression.COMPRESSORS["gzip"]})
+    assert accepted_encodings("br, zstd, gzip") == ["gzip", "identity"]
+
+
+def test_compress_variants_has_every_available_encoding(all_compressors):
+    body = b"x" * settings.GZIP_MINIMUM_SIZE
+    variants = compress_variants(body)
+    assert set(variants) == {"identity", "gzip", "br", "zstd"}
+    assert variants["identity"] == body
+    assert gzip.decompress(variants["gzip"]) == body
+    # mtime=0 keeps the output stable, so cached copies are identical
+    assert compress_variants(body)["gzip"] == variants["gzip"]
+
+
+def test_small_bodies_are_left_alone(all_compressors):
+    body = b"x" * (settings.GZIP_MINIMUM_SIZE - 1)
+    assert compress_variants(body) == {"identity": body}
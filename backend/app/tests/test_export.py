@@ -0,0 +1,68 @@
+"""Export streaming: gzip framing, buffering and the per-user row filter."""
+import gzip
+import zlib
+
+from app.core import export
+from app.core.export import EXCLUDED_COLUMNS, FLUSH_BYTES, _buffered, _select, gzip_stream
+from app.models.post import Comment, Post
+from app.models.user import User
+
+LINES = [f'{{"type": "post", "id": {i}}}\n'.encode() for i in range(5000)]
+
+
+def test_gzip_stream_round_trips():
+    assert gzip.decompress(b"".join(gzip_stream(LINES))) == b"".join(LINES)
+
+
+def test_gzip_stream_flushes_every_flush_bytes(monkeypatch):
+    monkeypatch.setattr(export, "FLUSH_BYTES", 100)
+    chunks = list(gzip_stream([b"x" * 60] * 4))
+    # A sync flush once 100 input bytes are pending makes them decodable
+    # before the stream ends
+    decompressor = zlib.decompressobj(31)
+    decoded = [len(decompressor.decompress(chunk)) for chunk in chunks[:-1]]
+    assert sum(decoded) == 240
+    assert gzip.decompress(b"".join(chunks)) == b"x" * 240
+
+
+def test_gzip_stream_of_nothing_is_valid():
+    assert gzip.decompress(b"".join(gzip_stream([]))) == b""
+
+
+def test_buffered_joins_small_chunks():
+    chunks = list(_buffered(LINES))
+    assert b"".join(chunks) == b"".join(LINES)
+    assert all(len(chunk) >= FLUSH_BYTES for chunk in chunks[:-1])
+    assert len(chunks) < len(LINES)
+
+
+def test_buffered_of_nothing_yields_nothing():
+    assert list(_buffered([])) == []
+
+
+def _where(query) -> str:
+    return str(query.whereclause) if query.whereclause is not None else ""
+
+
+def test_select_filters_users_by_id():
+    query = _select(User.__table__, 7)
+    assert _where(query) == "users.id = :id_1"
+    assert query.whereclause.right.value == 7
+
+
+def test_select_filters_other_tables_by_owner():
+    for table in (Post.__table__, Comment.__table__):
+        query = _select(table, 7)
+        assert _where(query) == f"{table.name}.user_id = :user_id_1"
+        assert query.whereclause.right.value == 7
+
+
+def test_select_without_user_exports_everything():
+    assert _select(Post.__table__, None).whereclause is None
+
+
+def test_select_leaves_out_excluded_columns():
+    for table in (User.__table__, Post.__table__):
+        names = {column.name for column in _select(table, None).selected_columns}
+        assert names and not names & EXCLUDED_COLUMNS
+    assert "password_hash" in User.__table__.c
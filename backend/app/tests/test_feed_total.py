@@ -0,0 +1,43 @@
+"""Feed page totals: short pages, the cached site counter and the estimate."""
+import pytest
+
+from app.api import posts
+from app.core import stats
+
+
+@pytest.fixture
+def estimate(monkeypatch):
+    monkeypatch.setattr(posts, "estimate_count", lambda db, query: 500)
+
+
+def _cache_count(count):
+    stats._store_counts(stats.SITE_STATS_KEY, stats._read_version(stats.SITE_STATS_KEY),
+                        {"published_posts": count}, 60)
+
+
+def test_short_page_is_the_exact_total(fake_redis, monkeypatch):
+    monkeypatch.setattr(posts, "estimate_count", lambda db, query: 1 / 0)  # must not estimate
+    assert posts._posts_total(None, None, None, 0, 10, 0) == (0, True)
+    assert posts._posts_total(None, None, "cats", 20, 10, 3) == (23, True)
+
+
+def test_empty_page_past_the_end_is_not_exact(fake_redis, estimate):
+    # Nothing found at skip=40 says nothing about how many posts come before
+    assert posts._posts_total(None, None, None, 40, 10, 0) == (500, False)
+
+
+def test_full_feed_page_uses_the_cached_count(fake_redis, estimate):
+    _cache_count(123)
+    assert posts._posts_total(None, None, None, 0, 10, 10) == (123, True)
+
+
+def test_full_page_falls_back_to_the_estimate(fake_redis, estimate):
+    assert posts._posts_total(None, None, None, 0, 10, 10) == (500, False)
+    # The site counter counts the feed, not search results
+    _cache_count(123)
+    assert posts._posts_total(None, None, "cats", 0, 10, 10) == (500, False)
+
+
+def test_estimate_is_never_below_what_was_seen(fake_redis, monkeypatch):
+    monkeypatch.setattr(posts, "estimate_count", lambda db, query: 5)
+    assert posts._posts_total(None, None, "cats", 90, 10, 10) == (100, False)
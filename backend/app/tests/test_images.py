@@ -0,0 +1,69 @@
+"""Upload processing: the pixel limit and what gets written (needs Pillow)."""
+import io
+import os
+
+import pytest
+
+from app.config import settings
+from app.core import images
+from app.core.images import InvalidImage, process_image
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def _png(width, height):
+    buffer = io.BytesIO()
+    Image.new("RGB", (width, height), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def media_root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "MEDIA_ROOT", str(tmp_path))
+    monkeypatch.setattr(settings, "MAX_IMAGE_PIXELS", 10_000)
+    return tmp_path
+
+
+def test_stores_original_and_variants(media_root):
+    digest = "ab" * 32
+    assert process_image(_png(100, 100), digest) == "png"
+    assert os.path.exists(images._media_path("original", digest, "png"))
+    for size in settings.IMAGE_SIZES:
+        assert os.path.exists(images._media_path(size, digest, "webp"))
+        assert os.path.exists(images._media_path(size, digest, "jpg"))
+
+
+def test_rejects_images_just_over_the_pixel_limit(media_root):
+    # 1.01x the limit: Pillow itself would only warn below 2x
+    with pytest.raises(InvalidImage, match="too large"):
+        process_image(_png(101, 100), "cd" * 32)
+    assert not any(files for _, _, files in os.walk(media_root))
+
+
+def test_rejects_non_images():
+    with pytest.raises(InvalidImage):
+        process_image(b"not an image", "ef" * 32)
+
+
+def test_original_is_stored_without_exif(media_root):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # orientation: rotate 90
+    exif[0x8825] = {2: (51.0, 30.0, 0.0)}  # GPS latitude
+    buffer = io.BytesIO()
+    Image.new("RGB", (100, 50), "red").save(buffer, "JPEG", exif=exif)
+    digest = "12" * 32
+    assert process_image(buffer.getvalue(), digest) == "jpg"
+    with Image.open(images._media_path("original", digest, "jpg")) as stored:
+        assert not stored.getexif()
+        assert "exif" not in stored.info
+        assert stored.size == (50, 100)
+
+
+def test_animated_gif_original_keeps_its_frames(media_root):
+    frames = [Image.new("RGB", (20, 20), color) for color in ("red", "green", "blue")]
+    buffer = io.BytesIO()
+    frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:], duration=100)
+    digest = "34" * 32
+    assert process_image(buffer.getvalue(), digest) == "gif"
+    with Image.open(images._media_path("original", digest, "gif")) as stored:
+        assert stored.n_frames == 3
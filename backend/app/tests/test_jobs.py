@@ -0,0 +1,132 @@
+"""Moderation jobs against the test database: batching, replies and resume.
+
+Needs TEST_DATABASE_URL (see conftest.py); Redis is fakeredis. Each test
+creates and purges its own users, so the seeded rows stay untouched.
+"""
+import json
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.core import jobs
+
+
+@pytest.fixture
+def db(seeded_engine, fake_redis, monkeypatch):
+    from app.database import SessionLocal
+
+    monkeypatch.setattr(settings, "JOB_BATCH_SIZE", 2)
+    monkeypatch.setattr(settings, "JOB_BATCH_DELAY", 0)
+    session = SessionLocal()
+    yield session
+    session.close()
+
+
+def _user(db):
+    from app.models.user import User
+
+    name = f"job_{uuid.uuid4().hex[:12]}"
+    user = User(email=f"{name}@example.com", username=name, password_hash="x")
+    db.add(user)
+    db.flush()
+    return user.id
+
+
+def _thread(db):
+    """A spammer's five comments on someone's post, with a reply chain under one"""
+    from app.models.post import Comment, Post, PostLike
+
+    spammer, author, replier = _user(db), _user(db), _user(db)
+    # A draft, so the feed the query-plan tests read is unchanged
+    post = Post(user_id=author, title="Hello", content="Hello, world", status="draft")
+    db.add(post)
+    db.flush()
+    comments = [Comment(post_id=post.id, user_id=spammer, content=f"spam {i}") for i in range(5)]
+    db.add_all(comments)
+    db.flush()
+    reply = Comment(post_id=post.id, user_id=author, content="stop", parent_comment_id=comments[0].id)
+    db.add(reply)
+    db.flush()
+    db.add(Comment(post_id=post.id, user_id=replier, content="+1", parent_comment_id=reply.id))
+    db.add(PostLike(user_id=spammer, post_id=post.id))
+    db.commit()
+    return spammer, author, replier, post.id
+
+
+def _purge(spammer):
+    return jobs.create_job("users", {"user_ids": [spammer], "deactivate": False, "purge_content": True})
+
+
+def _comments_left(db, post_id):
+    from app.models.post import Comment
+
+    return db.query(Comment).filter(Comment.post_id == post_id).count()
+
+
+def test_purge_deletes_replies_in_batches_and_resets_their_authors(db, fake_redis, monkeypatch):
+    spammer, author, replier, post_id = _thread(db)
+    for user_id in (author, replier):
+        fake_redis.hset(f"stats:user:{user_id}", "comments_count", 1)
+    fake_redis.hset(f"stats:post:{post_id}", "comments_count", 7)
+
+    batches = []
+    delete_batch = jobs._delete_batch
+    monkeypatch.setattr(jobs, "_delete_batch", lambda *args: batches.append(args[1].name) or delete_batch(*args))
+
+    job_id = _purge(spammer)
+    jobs.run_job(job_id)
+
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done", job["error"]
+    assert job["deleted"] == {"likes": 1, "comments": 7}
+    # 7 comments two at a time, plus the empty batch that ends the step
+    assert batches.count("comments") == 5
+    assert _comments_left(db, post_id) == 0
+    assert not fake_redis.exists(f"stats:user:{author}", f"stats:user:{replier}", f"stats:post:{post_id}")
+
+
+def test_resume_after_a_crash_between_commit_and_progress(db, fake_redis, monkeypatch):
+    spammer, _, _, post_id = _thread(db)
+    apply_batch = jobs._apply_batch
+    applied = []
+
+    def crash_on_third(*args):
+        applied.append(True)
+        if len(applied) == 3:
+            raise RuntimeError("worker killed")
+        apply_batch(*args)
+
+    monkeypatch.setattr(jobs, "_apply_batch", crash_on_third)
+    job_id = _purge(spammer)
+    jobs.run_job(job_id)
+    assert jobs.get_job(job_id)["status"] == "failed"
+    assert fake_redis.hexists(jobs._job_key(job_id), "pending")
+
+    monkeypatch.setattr(jobs, "_apply_batch", apply_batch)
+    jobs.run_job(job_id)
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done", job["error"]
+    assert job["deleted"] == {"likes": 1, "comments": 7}
+    assert not fake_redis.hexists(jobs._job_key(job_id), "pending")
+    assert _comments_left(db, post_id) == 0
+
+
+def test_resume_drops_a_batch_that_was_rolled_back(db, fake_redis):
+    from app.models.post import Comment
+
+    spammer, _, _, post_id = _thread(db)
+    job_id = _purge(spammer)
+    survivor = db.query(Comment.id).filter(Comment.user_id == spammer).first()[0]
+    # Saved as pending, then the worker died before committing
+    fake_redis.hset(jobs._job_key(job_id), mapping={
+        "step": 2,
+        "pending": json.dumps({"step": 2, "keys": [[survivor]], "collect": {}, "published": 0}),
+    })
+
+    jobs.run_job(job_id)
+    job = jobs.get_job(job_id)
+    assert job["status"] == "done", job["error"]
+    # The likes step was skipped by the saved step index, comments counted once
+    assert job["deleted"] == {"comments": 7}
+    assert _comments_left(db, post_id) == 0
@@ -0,0 +1,97 @@
+"""Read-through post and user cache against the test database.
+
+Needs TEST_DATABASE_URL (see conftest.py); Redis is fakeredis. Checks
+negative entries for unknown ids and that likes and comments only touch
+the counters, never the cached post body.
+"""
+import json
+import uuid
+
+from sqlalchemy import text
+
+from app.core.cache import NEGATIVE_ENTRY
+
+
+def _next_id(engine, sequence):
+    with engine.connect() as conn:
+        return conn.execute(text(f"SELECT last_value + 1 FROM {sequence}")).scalar()
+
+
+def _create_post(client, auth_headers):
+    response = client.post(
+        "/api/posts/", json={"title": "Cache test", "content": "A post for the cache tests"},
+        headers=auth_headers
+    )
+    assert response.status_code == 201, response.text
+    return response.json()["id"]
+
+
+def test_missing_post_is_cached_until_created(client, auth_headers, seeded_engine, fake_redis):
+    post_id = _next_id(seeded_engine, "posts_id_seq")
+    assert client.get(f"/api/posts/{post_id}").status_code == 404
+    assert json.loads(fake_redis.get(f"post:{post_id}")) == NEGATIVE_ENTRY
+
+    assert _create_post(client, auth_headers) == post_id
+    assert client.get(f"/api/posts/{post_id}").status_code == 200
+
+
+def test_missing_user_is_cached_until_registered(client, seeded_engine, fake_redis):
+    user_id = _next_id(seeded_engine, "users_id_seq")
+    assert client.get(f"/api/users/{user_id}").status_code == 404
+    assert json.loads(fake_redis.get(f"user:{user_id}")) == NEGATIVE_ENTRY
+
+    name = f"cache_{uuid.uuid4().hex[:12]}"
+    response = client.post(
+        "/api/auth/register", json={"email": f"{name}@example.com", "username": name, "password": "secret1"}
+    )
+    assert response.json()["id"] == user_id
+    assert client.get(f"/api/users/{user_id}").json()["username"] == name
+
+
+def test_likes_and_comments_bump_counters_and_keep_the_body(client, auth_headers, fake_redis):
+    post_id = _create_post(client, auth_headers)
+    assert client.get(f"/api/posts/{post_id}").json()["likes_count"] == 0
+    body = fake_redis.get(f"post:{post_id}")
+
+    client.post(f"/api/posts/{post_id}/like", headers=auth_headers)
+    assert fake_redis.hget(f"stats:post:{post_id}", "likes_count") == "1"
+    assert client.get(f"/api/posts/{post_id}").json()["likes_count"] == 1
+
+    client.post(f"/api/posts/{post_id}/comments", json={"content": "First"}, headers=auth_headers)
+    client.delete(f"/api/posts/{post_id}/like", headers=auth_headers)
+    post = client.get(f"/api/posts/{post_id}").json()
+    assert (post["likes_count"], post["comments_count"]) == (0, 1)
+    assert fake_redis.get(f"post:{post_id}") == body
+
+
+def test_feed_pages_are_served_pre_compressed_until_a_post_changes(client, auth_headers, fake_redis, monkeypatch):
+    from app.api import posts
+
+    page = client.get("/api/posts/?skip=0&limit=5", headers={"Accept-Encoding": "gzip"})
+    assert page.headers["content-encoding"] == "gzip"
+    first = page.json()["items"][0]
+
+    # A hit neither assembles nor compresses
+    with monkeypatch.context() as m:
+        m.setattr(posts, "assemble_posts_page", lambda *args: 1 / 0)
+        m.setattr(posts, "compress_variants", lambda *args: 1 / 0)
+        assert client.get("/api/posts/?skip=0&limit=5").json()["items"][0] == first
+
+    response = client.put(f"/api/posts/{first['id']}", json={"title": "Edited title"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert client.get("/api/posts/?skip=0&limit=5").json()["items"][0]["title"] == "Edited title"
+
+
+def test_search_results_follow_title_edits(client, auth_headers, fake_redis):
+    word = f"zq{uuid.uuid4().hex[:10]}"
+    post_id = _create_post(client, auth_headers)
+    assert client.get(f"/api/posts/?search={word}").json()["items"] == []
+
+    response = client.put(f"/api/posts/{post_id}", json={"title": f"Now about {word}"}, headers=auth_headers)
+    assert response.status_code == 200, response.text
+    assert [item["id"] for item in client.get(f"/api/posts/?search={word}").json()["items"]] == [post_id]
+
+    # Edits that leave the text alone keep the cached search lists
+    client.get(f"/api/posts/?search={word}")
+    client.put(f"/api/posts/{post_id}", json={"excerpt": "Short"}, headers=auth_headers)
+    assert fake_redis.exists(f"posts:ids:search:{word}:skip:0:limit:20")
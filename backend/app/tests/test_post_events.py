@@ -0,0 +1,72 @@
+"""Fan-out of post events to Server-Sent Event clients (no Redis needed)."""
+import asyncio
+import json
+
+import pytest
+
+from app.core.events import PostEventBroker, TooManyConnections
+
+
+async def _idle(self):
+    pass
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    # The Redis listener is replaced; events are dispatched by hand
+    monkeypatch.setattr(PostEventBroker, "_listen", _idle)
+    return PostEventBroker(max_connections=3, max_per_post=2, queue_size=2)
+
+
+def _message(event, data):
+    return json.dumps({"event": event, "data": data})
+
+
+def test_dispatch_reaches_only_that_posts_clients(broker):
+    async def run():
+        first, second, other = broker.subscribe(1), broker.subscribe(1), broker.subscribe(2)
+        broker._dispatch(1, _message("likes", {"post_id": 1, "likes_count": 5}))
+        frame = 'event: likes\ndata: {"post_id": 1, "likes_count": 5}\n\n'
+        assert first.get_nowait() == frame
+        assert second.get_nowait() == frame
+        assert other.empty()
+
+    asyncio.run(run())
+
+
+def test_connection_limits(broker):
+    async def run():
+        broker.subscribe(1)
+        broker.subscribe(1)
+        with pytest.raises(TooManyConnections):
+            broker.subscribe(1)
+        broker.subscribe(2)
+        with pytest.raises(TooManyConnections):
+            broker.subscribe(3)
+        assert broker.connections == 3
+
+    asyncio.run(run())
+
+
+def test_slow_client_is_disconnected(broker):
+    async def run():
+        slow = broker.subscribe(1)
+        for count in range(3):
+            broker._dispatch(1, _message("likes", {"likes_count": count}))
+        # Backlog dropped, only the close marker is left
+        assert slow.get_nowait() is None
+        assert slow.empty()
+        assert broker.connections == 0
+
+    asyncio.run(run())
+
+
+def test_unsubscribe_frees_the_slot_once(broker):
+    async def run():
+        queue = broker.subscribe(1)
+        broker.unsubscribe(1, queue)
+        broker.unsubscribe(1, queue)
+        assert broker.connections == 0
+        assert 1 not in broker._subscribers
+
+    asyncio.run(run())
@@ -0,0 +1,14 @@
+"""Profile endpoints against the test database (needs TEST_DATABASE_URL)."""
+
+
+def test_own_profile_needs_no_id(client, auth_headers, fake_redis):
+    response = client.get("/api/users/me/profile", headers=auth_headers)
+    assert response.status_code == 200, response.text
+    profile = response.json()
+    assert profile["id"] == 1
+    assert profile["email"] == "user1@example.com"
+    assert profile == client.get("/api/users/1/profile").json()
+
+
+def test_own_profile_needs_a_login(client, fake_redis):
+    assert client.get("/api/users/me/profile").status_code == 401
@@ -0,0 +1,36 @@
+"""Request profiles: shared through Redis, per worker while it is down."""
+import os
+
+import redis
+
+from app.config import settings
+from app.core import profiling
+from app.core.profiling import RequestProfile, record_profile, recent_profiles
+from app.schemas.admin import RequestProfile as RequestProfileSchema
+
+
+def _summary(path):
+    return RequestProfile("GET", path, "header").summary(0.01, 200)
+
+
+def test_profiles_are_shared_newest_first(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_BUFFER_SIZE", 3)
+    for number in range(5):
+        record_profile(_summary(f"/api/posts/{number}"))
+
+    recent = recent_profiles(10)
+    assert [profile["path"] for profile in recent] == ["/api/posts/4", "/api/posts/3", "/api/posts/2"]
+    assert recent[0]["worker"].endswith(f":{os.getpid()}")
+    RequestProfileSchema(**recent[0])
+
+
+def test_without_redis_a_worker_keeps_its_own(fake_redis, monkeypatch):
+    def down(*args, **kwargs):
+        raise redis.ConnectionError("refused")
+
+    monkeypatch.setattr(profiling, "profiles", profiling.deque(maxlen=3))
+    monkeypatch.setattr(fake_redis, "pipeline", down)
+    monkeypatch.setattr(fake_redis, "lrange", down)
+    record_profile(_summary("/api/posts/1"))
+    record_profile(_summary("/api/posts/2"))
+    assert [profile["path"] for profile in recent_profiles(1)] == ["/api/posts/2"]
@@ -0,0 +1,75 @@
+"""Query-plan regression tests.
+
+Every SQL statement an endpoint issues is EXPLAINed against the seeded
+database. A test fails when a plan sequentially scans one of the large
+tables or when its estimated cost goes over the budget, which is what a
+missing index on a hot path looks like.
+"""
+import pytest
+
+LARGE_TABLES = {"users", "posts", "comments", "post_likes", "favorites"}
+
+# Planner cost units; index lookups on the seed data stay far below this
+MAX_PLAN_COST = 5000
+
+ENDPOINT_CASES = {
+    "feed": "/api/posts/?skip=0&limit=20",
+    "feed_deep_page": "/api/posts/?skip=400&limit=20",
+    "feed_search": "/api/posts/?search=number%20123&limit=20",
+    "post_detail": "/api/posts/1",
+    "posts_batch": "/api/posts/batch?ids=1,2,3,4,5,99999",
+    "post_comments": "/api/posts/8/comments",
+    "user_detail": "/api/users/2",
+    "users_batch": "/api/users/batch?ids=1,2,3,99999",
+    "user_posts": "/api/users/2/posts",
+    "user_profile": "/api/users/2/profile",
+    "user_search": "/api/users/?search=user_123",
+    "my_favorites": "/api/users/me/favorites",
+}
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from _walk(child)
+
+
+def plan_problems(plan):
+    problems = []
+    if plan["Total Cost"] > MAX_PLAN_COST:
+        problems.append(f"plan cost {plan['Total Cost']} over budget {MAX_PLAN_COST}")
+    for node in _walk(plan):
+        if node["Node Type"] == "Seq Scan" and node.get("Relation Name") in LARGE_TABLES:
+            problems.append(f"sequential scan on {node['Relation Name']}")
+    return problems
+
+
+@pytest.mark.parametrize("path", ENDPOINT_CASES.values(), ids=ENDPOINT_CASES.keys())
+def test_endpoint_query_plans(client, auth_headers, flush_cache, capture_sql, explain, path):
+    flush_cache()
+    with capture_sql() as statements:
+        response = client.get(path, headers=auth_headers)
+
+    assert response.status_code == 200, response.text
+    assert statements, "endpoint issued no SQL"
+
+    failures = []
+    for statement, parameters in statements:
+        if not statement.lstrip().upper().startswith("SELECT"):
+            continue
+        for problem in plan_problems(explain(statement, parameters)):
+            failures.append(f"{problem}:\n    {statement}")
+    assert not failures, "\n".join(failures)
+
+
+def test_plan_problems_flags_seq_scans_and_cost():
+    plan = {
+        "Node Type": "Limit",
+        "Total Cost": MAX_PLAN_COST + 1,
+        "Plans": [{"Node Type": "Seq Scan", "Relation Name": "comments", "Total Cost": 1}],
+    }
+    assert plan_problems(plan) == [
+        f"plan cost {MAX_PLAN_COST + 1} over budget {MAX_PLAN_COST}",
+        "sequential scan on comments",
+    ]
+    assert plan_problems({"Node Type": "Seq Scan", "Relation Name": "tiny", "Total Cost": 1}) == []
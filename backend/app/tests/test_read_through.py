@@ -0,0 +1,68 @@
+"""read_through_many: misses, negative entries and deletes racing a load."""
+import json
+
+from app.core.cache import NEGATIVE_ENTRY, delete_keys, read_through_many
+
+
+def _key(object_id):
+    return f"thing:{object_id}"
+
+
+def _loader(rows, during=None):
+    def load(ids):
+        if during:
+            during()
+        return {object_id: rows[object_id] for object_id in ids if object_id in rows}
+
+    return load
+
+
+def test_misses_are_loaded_once_and_cached(fake_redis):
+    rows = {1: {"name": "one"}, 2: {"name": "two"}}
+    assert read_through_many([1, 2], _key, _loader(rows)) == rows
+    assert read_through_many([2, 1], _key, lambda ids: 1 / 0) == rows
+    assert fake_redis.ttl("thing:1") > 0
+
+
+def test_missing_ids_are_cached_as_negative_entries(fake_redis):
+    assert read_through_many([1, 3], _key, _loader({1: {"name": "one"}})) == {1: {"name": "one"}}
+    assert json.loads(fake_redis.get("thing:3")) == NEGATIVE_ENTRY
+    assert read_through_many([3], _key, lambda ids: 1 / 0) == {}
+
+
+def test_loaded_objects_are_tagged(fake_redis):
+    read_through_many([1], _key, _loader({1: {"owner": 7}}),
+                      tags=lambda body: [f"user:{body['owner']}"])
+    assert fake_redis.smembers("tag:user:7") == {"thing:1"}
+
+
+def test_delete_during_load_keeps_the_old_row_out(fake_redis):
+    # The load read the row, then an update committed and deleted the key
+    old = {1: {"name": "old"}}
+    assert read_through_many([1], _key, _loader(old, during=lambda: delete_keys("thing:1"))) == old
+    assert not fake_redis.exists("thing:1")
+
+    new = {1: {"name": "new"}}
+    assert read_through_many([1], _key, _loader(new)) == new
+    assert json.loads(fake_redis.get("thing:1")) == new[1]
+
+
+def test_create_during_load_keeps_the_negative_entry_out(fake_redis):
+    assert read_through_many([5], _key, _loader({}, during=lambda: delete_keys("thing:5"))) == {}
+    assert not fake_redis.exists("thing:5")
+
+
+def test_delete_only_blocks_its_own_key(fake_redis):
+    rows = {1: {"name": "one"}, 2: {"name": "two"}}
+    read_through_many([1, 2], _key, _loader(rows, during=lambda: delete_keys("thing:1")))
+    assert not fake_redis.exists("thing:1")
+    assert fake_redis.exists("thing:2")
+
+
+def test_redis_failure_still_loads_but_stores_nothing(fake_redis, monkeypatch):
+    def fail(*args, **kwargs):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(fake_redis, "mget", fail)
+    assert read_through_many([1], _key, _loader({1: {"name": "one"}})) == {1: {"name": "one"}}
+    assert not fake_redis.exists("thing:1")
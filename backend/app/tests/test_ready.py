@@ -0,0 +1,48 @@
+"""/ready: warm-up gating and Redis reported as degraded, not unready."""
+import time
+
+import pytest
+import redis
+from fastapi.testclient import TestClient
+
+from app.core import cache
+from app.main import create_app
+
+
+@pytest.fixture
+def app(fake_redis):
+    # No lifespan: the test decides when the instance counts as warm
+    return create_app()
+
+
+def test_not_ready_until_warm(app):
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 503
+
+
+def test_ready_with_redis(app):
+    app.state.ready = True
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ready", "redis": "ok"}
+
+
+def test_unreachable_redis_degrades_without_failing(app, fake_redis, monkeypatch):
+    app.state.ready = True
+
+    def down():
+        raise redis.ConnectionError("refused")
+
+    monkeypatch.setattr(fake_redis, "ping", down)
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 200
+    assert response.json()["redis"] == "degraded"
+
+
+def test_open_breaker_degrades_without_pinging(app, fake_redis, monkeypatch):
+    app.state.ready = True
+    cache.breaker.opened_at = time.monotonic()
+    monkeypatch.setattr(fake_redis, "ping", lambda: 1 / 0)
+    response = TestClient(app).get("/ready")
+    assert response.status_code == 200
+    assert response.json()["redis"] == "degraded"
@@ -0,0 +1,107 @@
+"""Related posts: the pending refresh, stored lists and the ranking query."""
+import json
+
+from app.api import posts
+from app.core import related
+from app.core.related import PENDING_KEY
+
+
+class FakePublished:
+    """Stands in for the Session; the published subset of the queried ids"""
+
+    def __init__(self, published):
+        self.published = published
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def __iter__(self):
+        return iter([(post_id,) for post_id in self.published])
+
+    def rollback(self):
+        pass
+
+
+def test_pending_refresh_recomputes_only_published_posts(fake_redis, monkeypatch):
+    computed = []
+
+    def compute(db, post_id):
+        computed.append(post_id)
+        return [post_id + 100]
+
+    monkeypatch.setattr(related, "compute_related", compute)
+    related.mark_related_stale(1, 2, 3)
+    # Post 2 was deleted or unpublished since it was marked
+    assert related.refresh_pending_related(FakePublished([1, 3])) == 2
+    assert sorted(computed) == [1, 3]
+    assert not fake_redis.exists(PENDING_KEY)
+    assert related.get_related_ids(1) == [101]
+    assert related.get_related_ids(2) is None
+
+
+def test_nothing_pending_refreshes_nothing(fake_redis, monkeypatch):
+    monkeypatch.setattr(related, "compute_related", lambda db, post_id: 1 / 0)
+    assert related.refresh_pending_related(FakePublished([])) == 0
+
+
+def test_stored_list_is_read_back(fake_redis):
+    assert related.get_related_ids(5) is None
+    fake_redis.set("related:5", json.dumps([9, 7, 8]))
+    assert related.get_related_ids(5) == [9, 7, 8]
+
+
+def test_stored_list_is_none_when_redis_fails(fake_redis, monkeypatch):
+    fake_redis.set("related:5", json.dumps([9, 7, 8]))
+
+    def fail(key):
+        raise ConnectionError("down")
+
+    monkeypatch.setattr(fake_redis, "get", fail)
+    assert related.get_related_ids(5) is None
+
+
+def test_related_endpoint_skips_deleted_posts(fake_redis, monkeypatch):
+    fake_redis.set("related:5", json.dumps([9, 7, 8]))
+    # Post 7 was deleted after the list was computed
+    monkeypatch.setattr(posts, "_load_posts", lambda db, ids: {9: {"id": 9}, 8: {"id": 8}})
+    assert posts.get_related_posts(5, None) == [{"id": 9}, {"id": 8}]
+
+
+def test_related_endpoint_is_empty_before_the_first_refresh(fake_redis, monkeypatch):
+    monkeypatch.setattr(posts, "_load_posts", lambda db, ids: 1 / 0)
+    assert posts.get_related_posts(5, None) == []
+
+
+def test_ranking_query_finds_text_and_co_like_matches(seeded_engine):
+    # Needs TEST_DATABASE_URL, like the query-plan suite
+    from sqlalchemy import text
+    from app.database import SessionLocal
+
+    db = SessionLocal()
+
+    def add_post(title, status="published"):
+        return db.execute(text(
+            "INSERT INTO posts (user_id, title, content, status) "
+            "VALUES (1, :title, :title || ' and some more words', :status) RETURNING id"
+        ), {"title": title, "status": status}).scalar()
+
+    try:
+        source = add_post("Zyxquark plasmoidal resonance")
+        text_match = add_post("Zyxquark plasmoidal gardening")
+        draft_match = add_post("Zyxquark plasmoidal draft", status="draft")
+        co_liked = add_post("Unrelated wording entirely")
+        for user_id in (2, 3):
+            for post_id in (source, co_liked):
+                db.execute(text("INSERT INTO post_likes (user_id, post_id) VALUES (:u, :p)"),
+                           {"u": user_id, "p": post_id})
+
+        ranked = related.compute_related(db, source)
+        assert set(ranked) >= {text_match, co_liked}
+        assert source not in ranked
+        assert draft_match not in ranked
+    finally:
+        db.rollback()
+        db.close()
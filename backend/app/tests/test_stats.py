@@ -0,0 +1,139 @@
+"""Cached counters: bumps, resets and writes racing a database count."""
+from app.config import settings
+from app.core import stats
+
+COUNTS = {field: 0 for field in stats.STATS_FIELDS}
+
+
+def test_count_is_cached_and_then_bumped(fake_redis, monkeypatch):
+    monkeypatch.setattr(stats, "_count_user_stats", lambda db, user_id: dict(COUNTS, posts_count=2))
+    assert stats.get_user_stats(None, 7)["posts_count"] == 2
+
+    stats.bump_user_stat(7, "posts_count")
+    monkeypatch.setattr(stats, "_count_user_stats", lambda db, user_id: 1 / 0)  # must not recount
+    assert stats.get_user_stats(None, 7)["posts_count"] == 3
+
+
+def test_bump_without_cached_counters_creates_nothing(fake_redis):
+    stats.bump_user_stat(7, "posts_count")
+    assert not fake_redis.exists("stats:user:7")
+
+
+def test_bump_during_count_keeps_the_count_out_of_cache(fake_redis, monkeypatch):
+    def count_while_a_post_is_created(db, user_id):
+        # The new post commits and bumps after the count has started
+        stats.bump_user_stat(user_id, "posts_count")
+        return dict(COUNTS, posts_count=2)
+
+    monkeypatch.setattr(stats, "_count_user_stats", count_while_a_post_is_created)
+    assert stats.get_user_stats(None, 7)["posts_count"] == 2
+    assert not fake_redis.exists("stats:user:7")
+
+    monkeypatch.setattr(stats, "_count_user_stats", lambda db, user_id: dict(COUNTS, posts_count=3))
+    assert stats.get_user_stats(None, 7)["posts_count"] == 3
+    assert fake_redis.hget("stats:user:7", "posts_count") == "3"
+
+
+def test_reset_during_count_keeps_the_count_out_of_cache(fake_redis, monkeypatch):
+    def count_while_content_is_deleted(db, user_id):
+        stats.reset_user_stats(user_id)
+        return dict(COUNTS, comments_count=5)
+
+    monkeypatch.setattr(stats, "_count_user_stats", count_while_content_is_deleted)
+    stats.get_user_stats(None, 7)
+    assert not fake_redis.exists("stats:user:7")
+
+
+def test_reset_drops_cached_counters(fake_redis, monkeypatch):
+    monkeypatch.setattr(stats, "_count_user_stats", lambda db, user_id: dict(COUNTS))
+    stats.get_user_stats(None, 7)
+    stats.get_user_stats(None, 8)
+    stats.reset_user_stats(7, 8)
+    assert not fake_redis.exists("stats:user:7", "stats:user:8")
+
+
+def test_published_posts_count_bump(fake_redis):
+    assert stats.get_published_posts_count() is None
+    stats.bump_published_posts_count()
+    assert stats.get_published_posts_count() is None
+
+    version = stats._read_version(stats.SITE_STATS_KEY)
+    stats.bump_published_posts_count()
+    stats._store_counts(stats.SITE_STATS_KEY, version, {"published_posts": 10}, 60)
+    assert stats.get_published_posts_count() is None
+
+    stats._store_counts(stats.SITE_STATS_KEY, stats._read_version(stats.SITE_STATS_KEY),
+                        {"published_posts": 10}, 60)
+    stats.bump_published_posts_count(-1)
+    assert stats.get_published_posts_count() == 9
+
+
+class FakeCountQuery:
+    def __init__(self, count):
+        self.count = count
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def scalar(self):
+        return self.count
+
+
+def test_published_posts_count_uses_the_site_ttl(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "SITE_STATS_TTL", 1234)
+    stats.ensure_published_posts_count(FakeCountQuery(42))
+    assert stats.get_published_posts_count() == 42
+    assert fake_redis.ttl(stats.SITE_STATS_KEY) == 1234
+
+
+class FakeCounts:
+    """Stands in for the Session in get_post_counts: likes rows, then comments rows"""
+
+    def __init__(self, likes, comments, during=None):
+        self.results = [likes, comments]
+        self.during = during
+
+    def query(self, *columns):
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def group_by(self, *columns):
+        return self
+
+    def all(self):
+        if self.during and len(self.results) == 1:
+            self.during()
+        return self.results.pop(0)
+
+
+def test_post_counts_are_cached_and_bumped(fake_redis):
+    assert stats.get_post_counts(FakeCounts([(1, 4)], []), [1, 2]) == {
+        1: {"likes_count": 4, "comments_count": 0},
+        2: {"likes_count": 0, "comments_count": 0},
+    }
+    stats.bump_post_count(1, "comments_count")
+    assert stats.get_post_counts(None, [1]) == {1: {"likes_count": 4, "comments_count": 1}}
+
+
+def test_like_during_post_count_keeps_the_count_out_of_cache(fake_redis):
+    def like_while_counting():
+        stats.bump_post_count(1, "likes_count")
+
+    counts = stats.get_post_counts(FakeCounts([(1, 4), (2, 1)], [], during=like_while_counting), [1, 2])
+    assert counts[1]["likes_count"] == 4
+    # Only the post that changed is left for a recount
+    assert not fake_redis.exists("stats:post:1")
+    assert fake_redis.hget("stats:post:2", "likes_count") == "1"
+
+
+def test_post_count_reset_during_count_keeps_it_out_of_cache(fake_redis):
+    def delete_while_counting():
+        stats.reset_post_counts(1)
+
+    stats.get_post_counts(FakeCounts([(1, 4)], [], during=delete_while_counting), [1])
+    assert not fake_redis.exists("stats:post:1")
@@ -0,0 +1,97 @@
+"""Rotating refresh tokens: rotation, reuse detection and revocation."""
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import tokens
+from app.core.tokens import (
+    RefreshTokenError, RefreshTokenReused, forget_session_user, issue_refresh_token,
+    revoke_refresh_token, revoke_user_sessions, rotate_refresh_token, session_username
+)
+
+
+class FakeUsers:
+    """Stands in for the Session; answers the user lookup and counts queries"""
+
+    def __init__(self, username="alice", is_active=True):
+        self.row = SimpleNamespace(username=username, is_active=is_active)
+        self.queries = 0
+
+    def query(self, *columns):
+        self.queries += 1
+        return self
+
+    def filter(self, *criteria):
+        return self
+
+    def first(self):
+        return self.row
+
+
+def test_rotation_replaces_the_token(fake_redis):
+    token = issue_refresh_token(7)
+    user_id, new_token = rotate_refresh_token(token)
+    assert user_id == 7
+    assert new_token.split(".")[0] == token.split(".")[0]
+    assert rotate_refresh_token(new_token)[0] == 7
+    assert "username" not in fake_redis.hgetall(tokens._family_key(token.split(".")[0]))
+
+
+def test_reuse_revokes_the_family(fake_redis):
+    token = issue_refresh_token(7)
+    _, new_token = rotate_refresh_token(token)
+    with pytest.raises(RefreshTokenReused):
+        rotate_refresh_token(token)
+    # The legitimate holder is logged out too
+    with pytest.raises(RefreshTokenError):
+        rotate_refresh_token(new_token)
+
+
+@pytest.mark.parametrize("token", ["garbage", "nofamily.secret", ".secret"])
+def test_unknown_tokens_are_rejected(fake_redis, token):
+    with pytest.raises(RefreshTokenError):
+        rotate_refresh_token(token)
+
+
+def test_logout_needs_the_current_token(fake_redis):
+    token = issue_refresh_token(7)
+    family = token.split(".")[0]
+    _, new_token = rotate_refresh_token(token)
+
+    revoke_refresh_token(token)
+    assert fake_redis.exists(tokens._family_key(family))
+
+    revoke_refresh_token(new_token)
+    assert not fake_redis.exists(tokens._family_key(family))
+    assert fake_redis.smembers(tokens._user_families_key(7)) == set()
+
+
+def test_revoke_user_sessions_ends_every_session(fake_redis):
+    sessions = [issue_refresh_token(7), issue_refresh_token(7)]
+    other = issue_refresh_token(8)
+    session_username(FakeUsers(), 7)
+
+    revoke_user_sessions(7)
+    for token in sessions:
+        with pytest.raises(RefreshTokenError):
+            rotate_refresh_token(token)
+    assert not fake_redis.exists(tokens._session_user_key(7))
+    assert rotate_refresh_token(other)[0] == 8
+
+
+def test_session_username_is_cached_until_forgotten(fake_redis):
+    db = FakeUsers("alice")
+    assert session_username(db, 7) == "alice"
+    db.row.username = "alicia"
+    assert session_username(db, 7) == "alice"
+    assert db.queries == 1
+
+    forget_session_user(7)
+    assert session_username(db, 7) == "alicia"
+
+
+def test_inactive_users_have_no_session_username(fake_redis):
+    db = FakeUsers(is_active=False)
+    assert session_username(db, 7) is None
+    assert session_username(db, 7) is None
+    assert db.queries == 1
@@ -0,0 +1,95 @@
+"""Feed warmer: the lock, the pending flag and popularity tracking."""
+import json
+
+import pytest
+
+from app.config import settings
+from app.core import warmer
+from app.core.warmer import LOCK_KEY, PENDING_KEY, POPULARITY_KEY, record_feed_hit, request_feed_warm
+
+
+class FakeSession:
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def warm(fake_redis, monkeypatch):
+    monkeypatch.setattr(warmer, "SessionLocal", FakeSession)
+    monkeypatch.setattr(warmer, "ensure_published_posts_count", lambda db: None)
+    monkeypatch.setattr(settings, "CACHE_WARM_DELAY", 0)
+    warmed = []
+
+    def run(during=None):
+        def warm_page(db, search, skip, limit):
+            warmed.append((search, skip, limit))
+            if during:
+                during()
+
+        warmer.warm_feed_cache(warm_page)
+        return warmed
+
+    return run
+
+
+def test_pending_pass_warms_front_page_and_popular_pages(warm, fake_redis):
+    record_feed_hit("cats", 0, 20)
+    record_feed_hit("cats", 0, 20)
+    request_feed_warm()
+    assert warm() == [(None, 0, 20), ("cats", 0, 20)]
+    assert not fake_redis.exists(PENDING_KEY, LOCK_KEY)
+    # Decayed after the pass
+    assert fake_redis.zscore(POPULARITY_KEY, json.dumps(["cats", 0, 20])) == 1
+
+
+def test_nothing_pending_nothing_warmed(warm):
+    assert warm() == []
+
+
+def test_lock_holder_is_left_alone(warm, fake_redis):
+    fake_redis.set(LOCK_KEY, "other worker")
+    request_feed_warm()
+    assert warm() == []
+    assert fake_redis.exists(PENDING_KEY)
+    assert fake_redis.get(LOCK_KEY) == "other worker"
+
+
+def test_request_while_warming_runs_another_pass(warm):
+    requested = []
+
+    def invalidate_once():
+        if not requested:
+            requested.append(True)
+            request_feed_warm()
+
+    request_feed_warm()
+    assert warm(during=invalidate_once) == [(None, 0, 20), (None, 0, 20)]
+
+
+def test_request_during_unlock_is_not_lost(warm, monkeypatch):
+    release = warmer._release
+    calls = []
+
+    def release_after_a_request(token):
+        # Lands after the holder's last pending check, while it still holds the lock
+        if not calls:
+            request_feed_warm()
+        calls.append(token)
+        release(token)
+
+    monkeypatch.setattr(warmer, "_release", release_after_a_request)
+    request_feed_warm()
+    assert len(warm()) == 2
+    assert len(calls) == 2
+
+
+def test_long_searches_are_not_tracked(fake_redis):
+    record_feed_hit("x" * (settings.CACHE_WARM_MAX_SEARCH + 1), 0, 20)
+    assert fake_redis.zcard(POPULARITY_KEY) == 0
+
+
+def test_popularity_is_trimmed_on_record(fake_redis, monkeypatch):
+    monkeypatch.setattr(settings, "CACHE_WARM_TRACKED", 2)
+    for skip in range(10):
+        record_feed_hit(None, skip, 20)
+    assert fake_redis.zcard(POPULARITY_KEY) == 4
@@ -0,0 +1,24 @@
+import sys
+sys.path.insert(0, '.')
+
+from app.database import SessionLocal
+from app.core.related import refresh_all_related, refresh_pending_related
+
+# Run from cron: "--pending" often (posts created, edited or liked since the
+# last run), a full refresh nightly so co-like signals stay current everywhere.
+
+def refresh_related():
+    db = SessionLocal()
+
+    try:
+        if "--pending" in sys.argv[1:]:
+            refreshed = refresh_pending_related(db)
+        else:
+            refreshed = refresh_all_related(db)
+    finally:
+        db.close()
+
+    print(f"✅ Refreshed related posts for {refreshed} posts")
+
+if __name__ == "__main__":
+    refresh_related()
@@ -24,6 +24,25 @@ export default function PostDetail() {
     fetchComments();
   }, [id]);
 
+  // Live comments and like counts instead of refetching
+  useEffect(() => {
+    const events = new EventSource(`/api/posts/${id}/events`);
+
+    events.addEventListener('comment', (e) => {
+      const comment = JSON.parse(e.data);
+      setComments((prev) =>
+        prev.some((c) => c.id === comment.id) ? prev : [comment, ...prev]
+      );
+    });
+
+    events.addEventListener('likes', (e) => {
+      const { likes_count } = JSON.parse(e.data);
+      setPost((prev) => (prev ? { ...prev, likes_count } : prev));
+    });
+
+    return () => events.close();
+  }, [id]);
+
   const fetchPost = async () => {
     try {
       setLoading(true);
@@ -7,7 +7,7 @@ import { User, Mail, Calendar, Edit2, Save, X } from 'lucide-react';
 import { formatDate } from '../utils/formatDate';
 
 export default function Profile() {
-  const { user, updateUser } = useAuthStore();
+  const { updateUser } = useAuthStore();
   const [profile, setProfile] = useState(null);
   const [posts, setPosts] = useState([]);
   const [isEditing, setIsEditing] = useState(false);
@@ -19,26 +19,27 @@ export default function Profile() {
 
   useEffect(() => {
     fetchProfile();
-    fetchUserPosts();
   }, []);
 
   const fetchProfile = async () => {
     try {
-      const response = await api.get('/users/me');
+      // The auth store only holds tokens, so the id comes from this response
+      const response = await api.get('/users/me/profile');
       setProfile(response.data);
       setFormData({
         username: response.data.username,
         email: response.data.email,
         bio: response.data.bio || '',
       });
+      fetchUserPosts(response.data.id);
     } catch (err) {
       toast.error('Failed to load profile');
     }
   };
 
-  const fetchUserPosts = async () => {
+  const fetchUserPosts = async (userId) => {
     try {
-      const response = await api.get(`/users/${user.id}/posts`);
+      const response = await api.get(`/users/${userId}/posts`);
       setPosts(response.data);
     } catch (err) {
       console.error('Failed to load user posts');
@@ -51,7 +52,7 @@ export default function Profile() {
     try {
       const response = await api.put('/users/me', formData);
       updateUser(response.data);
-      setProfile(response.data);
+      setProfile((prev) => ({ ...prev, ...response.data }));
       setIsEditing(false);
       toast.success('Profile updated successfully!');
     } catch (err) {
@@ -14,6 +14,8 @@ export const useAuthStore = create(
         set({ user, token, isAuthenticated: true });
       },
       
+      updateUser: (user) => set({ user }),
+      
       register: async (email, username, password) => {
         try {
           const response = await api.post('/auth/register', {
@@ -38,8 +40,11 @@ export const useAuthStore = create(
             password,
           });
           
-          const { access_token, user } = response.data;
+          const { access_token, refresh_token, user } = response.data;
           localStorage.setItem('token', access_token);
+          if (refresh_token) {
+            localStorage.setItem('refresh_token', refresh_token);
+          }
           set({ user, token: access_token, isAuthenticated: true });
           
           return { success: true };
@@ -53,7 +58,12 @@ export const useAuthStore = create(
       },
       
       logout: () => {
+        const refreshToken = localStorage.getItem('refresh_token');
+        if (refreshToken) {
+          api.post('/auth/logout', { refresh_token: refreshToken }).catch(() => {});
+        }
         localStorage.removeItem('token');
+        localStorage.removeItem('refresh_token');
         set({ user: null, token: null, isAuthenticated: false });
       },
     }),
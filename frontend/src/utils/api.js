@@ -18,4 +18,40 @@ api.interceptors.request.use(
   (error) => Promise.reject(error)
 );
 
+// One refresh at a time: parallel 401s wait for the same rotation, since
+// presenting an already rotated refresh token revokes the whole session
+let refreshing = null;
+
+const refreshTokens = async () => {
+  const refreshToken = localStorage.getItem('refresh_token');
+  if (!refreshToken) {
+    throw new Error('No refresh token');
+  }
+  const response = await axios.post('/api/auth/refresh', { refresh_token: refreshToken });
+  localStorage.setItem('token', response.data.access_token);
+  localStorage.setItem('refresh_token', response.data.refresh_token);
+  return response.data.access_token;
+};
+
+api.interceptors.response.use(
+  (response) => response,
+  async (error) => {
+    const original = error.config;
+    if (error.response?.status !== 401 || original._retried || original.url.startsWith('/auth/')) {
+      return Promise.reject(error);
+    }
+    original._retried = true;
+    try {
+      refreshing = refreshing || refreshTokens().finally(() => { refreshing = null; });
+      const token = await refreshing;
+      original.headers.Authorization = `Bearer ${token}`;
+      return api(original);
+    } catch (refreshError) {
+      localStorage.removeItem('token');
+      localStorage.removeItem('refresh_token');
+      return Promise.reject(error);
+    }
+  }
+);
+
 export default api;
\ No newline at end of file